@@ -1,9 +1,18 @@
 """
 甲狀腺功能判讀 API 服務
 """
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import os
+import asyncio
+import threading
+from functools import lru_cache
+from pathlib import Path
+import aiofiles
+import orjson
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Dict, List, Optional
 import uvicorn
 from src.rag_engine import RAGEngine
@@ -13,7 +22,8 @@ from config import Config
 app = FastAPI(
     title=Config.APP_NAME + " API",
     version=Config.APP_VERSION,
-    description="甲狀腺功能智慧判讀 API 服務"
+    description="甲狀腺功能智慧判讀 API 服務",
+    default_response_class=ORJSONResponse
 )
 
 # CORS 設定
@@ -25,13 +35,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 初始化引擎
-rag_engine = RAGEngine()
-analyzer = ThyroidAnalyzer()
+# 回應壓縮（最後加入者位於最外層，報告等大型回應會被壓縮）
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
+# 上傳檔案每次讀取的位元組數
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# 固定內容的回應於載入時預先序列化
+NORMAL_RANGES_JSON = orjson.dumps(Config.NORMAL_RANGES)
+HEALTH_JSON = orjson.dumps({"status": "healthy", "service": "thyroid-analyzer"})
+
+# 初始化引擎（每個 worker 首次使用時建立一次）
+# RAG 引擎由背景暖機與請求的依賴注入在不同執行緒中取得，以鎖確保只建立一次
+_rag_engine: Optional[RAGEngine] = None
+_rag_lock = threading.Lock()
+
+def get_rag() -> RAGEngine:
+    """取得 RAG 引擎實例（暖機期間到達的請求會等待同一個實例建立完成）"""
+    global _rag_engine
+    if _rag_engine is None:
+        with _rag_lock:
+            if _rag_engine is None:
+                _rag_engine = RAGEngine()
+    return _rag_engine
+
+@lru_cache(maxsize=1)
+def get_analyzer() -> ThyroidAnalyzer:
+    """取得甲狀腺分析器實例"""
+    return ThyroidAnalyzer()
+
+@app.on_event("startup")
+async def warm_up_engines():
+    """在背景預先建立 RAG 引擎，避免首個請求承擔初始化成本"""
+    app.state.warm_up_task = asyncio.create_task(asyncio.to_thread(get_rag))
 
 # 資料模型
 class LabData(BaseModel):
     """檢驗數據模型"""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
     TSH: Optional[float] = Field(None, description="TSH 數值 (μIU/mL)")
     Free_T4: Optional[float] = Field(None, description="Free T4 數值 (ng/dL)")
     Free_T3: Optional[float] = Field(None, description="Free T3 數值 (pg/mL)")
@@ -69,7 +111,11 @@ async def root():
     }
 
 @app.post("/analyze", response_model=AnalysisResponse)
-async def analyze_thyroid_function(request: AnalysisRequest):
+async def analyze_thyroid_function(
+    request: AnalysisRequest,
+    rag_engine: RAGEngine = Depends(get_rag),
+    analyzer: ThyroidAnalyzer = Depends(get_analyzer)
+):
     """
     分析甲狀腺功能
     
@@ -77,20 +123,21 @@ async def analyze_thyroid_function(request: AnalysisRequest):
     """
     try:
         # 轉換檢驗數據
-        lab_data = {k: v for k, v in request.lab_data.dict().items() if v is not None}
+        lab_data = request.lab_data.model_dump(exclude_none=True)
         
         if not lab_data:
             raise HTTPException(status_code=400, detail="請提供至少一項檢驗數據")
         
-        # 使用分析器進行診斷
-        diagnosis_result = analyzer.analyze(
+        # 使用分析器進行診斷（移至執行緒，避免阻塞事件迴圈）
+        diagnosis_result = await asyncio.to_thread(
+            analyzer.analyze,
             lab_data=lab_data,
             symptoms=request.symptoms
         )
         
         # 使用 RAG 獲取 AI 診斷
         question = request.question or f"患者檢驗結果顯示{diagnosis_result.thyroid_status.value}，請提供詳細的診斷和治療建議。"
-        rag_response = rag_engine.query(question, lab_data)
+        rag_response = await rag_engine.aquery(question, lab_data)
         
         # 生成報告
         report = analyzer.generate_report(diagnosis_result, lab_data)
@@ -115,41 +162,74 @@ async def analyze_thyroid_function(request: AnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/upload_document")
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(
+    file: UploadFile = File(...),
+    rag_engine: RAGEngine = Depends(get_rag)
+):
     """
     上傳醫學文件到知識庫
     
     支援 PDF 和文字檔案格式
     """
     try:
+        # 只保留檔名，避免路徑穿越
+        filename = Path(file.filename).name
+        
         # 檢查檔案類型
-        if not file.filename.endswith(('.pdf', '.txt')):
+        if not filename.endswith(('.pdf', '.txt')):
             raise HTTPException(status_code=400, detail="只支援 PDF 和 TXT 格式")
         
-        # 儲存檔案
-        file_path = f"./data/documents/{file.filename}"
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        # 檢查檔案大小
+        if file.size is not None and file.size > Config.MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=413, detail="檔案過大")
         
-        # 加入 RAG 系統
-        doc_type = "pdf" if file.filename.endswith('.pdf') else "txt"
-        result = rag_engine.add_document(file_path, doc_type)
+        # 分段寫入檔案，避免整份文件載入記憶體
+        file_path = f"./data/documents/{filename}"
+        written = 0
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > Config.MAX_UPLOAD_SIZE:
+                    break
+                await f.write(chunk)
+        
+        if written > Config.MAX_UPLOAD_SIZE:
+            os.remove(file_path)
+            raise HTTPException(status_code=413, detail="檔案過大")
         
-        return {"message": result, "filename": file.filename}
+        # 加入 RAG 系統
+        doc_type = "pdf" if filename.endswith('.pdf') else "txt"
+        result = await asyncio.to_thread(rag_engine.add_document, file_path, doc_type)
         
+        return {"message": result, "filename": filename}
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/normal_ranges")
 async def get_normal_ranges():
     """獲取檢驗項目的正常值範圍"""
-    return Config.NORMAL_RANGES
+    return Response(
+        NORMAL_RANGES_JSON,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=86400, immutable"}
+    )
+
+@app.get("/metrics")
+async def get_metrics(rag_engine: RAGEngine = Depends(get_rag)):
+    """快取命中統計"""
+    return {"embedding_cache": rag_engine.embedding_cache.stats()}
 
 @app.get("/health")
 async def health_check():
-    """健康檢查端點"""
-    return {"status": "healthy", "service": "thyroid-analyzer"}
+    """健康檢查端點（不可快取，確保每次檢查都實際到達服務）"""
+    return Response(
+        HEALTH_JSON,
+        media_type="application/json",
+        headers={"Cache-Control": "no-store"}
+    )
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -4,11 +4,11 @@
 """
 import streamlit as st
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import plotly.graph_objects as go
-from src.rag_engine import RAGEngine
 from src.literature_based_analyzer import LiteratureBasedAnalyzer
-from src.thyroid_analyzer import ThyroidAnalyzer
+from src.thyroid_analyzer import ThyroidAnalyzer, DiagnosisResult
+from src import ui_helpers
 from config import Config
 import os
 
@@ -32,10 +32,32 @@ def initialize_engines(api_key=None, model=None):
     if model:
         Config.LLM_MODEL = model
     
-    # 暫時使用簡化版的初始化，避免 ChromaDB 相容性問題
-    # rag_engine = RAGEngine()
+    # 只有啟用 RAG 時才匯入 rag_engine（連帶載入 LangChain、FAISS 等重量級模組）
+    rag_engine = None
+    if Config.USE_RAG:
+        from src.rag_engine import RAGEngine
+        rag_engine = RAGEngine()
     analyzer = ThyroidAnalyzer()
-    return None, analyzer
+    return rag_engine, analyzer
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_analyze(
+    lab_items: Tuple[Tuple[str, float], ...],
+    symptoms: Tuple[str, ...],
+    _analyzer: ThyroidAnalyzer
+) -> DiagnosisResult:
+    """快取相同檢驗數據與症狀的分析結果"""
+    return _analyzer.analyze(lab_data=dict(lab_items), symptoms=list(symptoms))
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_report(
+    lab_items: Tuple[Tuple[str, float], ...],
+    symptoms: Tuple[str, ...],
+    _analyzer: ThyroidAnalyzer
+) -> str:
+    """快取相同輸入的診斷報告"""
+    diagnosis_result = cached_analyze(lab_items, symptoms, _analyzer)
+    return _analyzer.generate_report(diagnosis_result, dict(lab_items))
 
 def main():
     st.title("🦋 " + Config.APP_NAME)
@@ -168,17 +190,22 @@ def main():
             st.error("請至少輸入 TSH 數值")
             return
         
+        # 轉為可雜湊的快取鍵（lab_data 的插入順序固定，不需排序）
+        lab_items = tuple(lab_data.items())
+        symptom_items = tuple(symptoms)
+        
         # 顯示分析中
         with st.spinner("正在分析檢驗結果..."):
             # 使用分析器進行診斷
-            diagnosis_result = analyzer.analyze(
-                lab_data=lab_data,
-                symptoms=symptoms if symptoms else []
-            )
+            diagnosis_result = cached_analyze(lab_items, symptom_items, analyzer)
             
-            # 由於RAG引擎暫時禁用，提供基本診斷建議
-            rag_response = {
-                "diagnosis": f"""
+            if rag_engine is not None:
+                question = f"患者檢驗結果顯示{diagnosis_result.thyroid_status.value}，請提供詳細的診斷和治療建議。"
+                rag_response = rag_engine.query(question, lab_data)
+            else:
+                # RAG 未啟用時，提供基本診斷建議
+                rag_response = {
+                    "diagnosis": f"""
 ## {diagnosis_result.thyroid_status.value}診斷建議
 
 根據檢驗結果，患者被診斷為**{diagnosis_result.thyroid_status.value}**。
@@ -194,8 +221,8 @@ def main():
 
 ### 注意事項
 請記住這只是初步建議，具體治療方案請遵循醫師指導。
-                """
-            }
+                    """
+                }
         
         # 顯示結果
         col1, col2 = st.columns(2)
@@ -204,7 +231,7 @@ def main():
             st.subheader("📊 檢驗結果視覺化")
             
             # 創建檢驗結果圖表
-            fig = create_lab_chart(lab_data, Config.NORMAL_RANGES)
+            fig = create_lab_chart(lab_data)
             st.plotly_chart(fig, use_container_width=True)
             
             # 檢驗結果表格
@@ -242,7 +269,7 @@ def main():
             st.markdown(rag_response["diagnosis"])
         
         # 下載報告
-        report = analyzer.generate_report(diagnosis_result, lab_data)
+        report = cached_report(lab_items, symptom_items, analyzer)
         st.download_button(
             label="📥 下載診斷報告",
             data=report,
@@ -267,85 +294,21 @@ def main():
                     with open(file_path, "wb") as f:
                         f.write(uploaded_file.getbuffer())
                     
-                    # 由於RAG系統暫時禁用
-                    st.success("文件已上傳，但RAG系統暫時禁用。")
+                    if rag_engine is not None:
+                        doc_type = "pdf" if uploaded_file.name.endswith('.pdf') else "txt"
+                        st.success(rag_engine.add_document(file_path, doc_type))
+                    else:
+                        st.success("文件已上傳，但RAG系統未啟用。")
 
-def create_lab_chart(lab_data: Dict[str, float], normal_ranges: Dict) -> go.Figure:
+@st.cache_data(show_spinner=False)
+def create_lab_chart(lab_data: Dict[str, float]) -> go.Figure:
     """創建檢驗結果視覺化圖表"""
-    fig = go.Figure()
-    
-    tests = []
-    values = []
-    lower_bounds = []
-    upper_bounds = []
-    
-    for test_name, value in lab_data.items():
-        if test_name in normal_ranges:
-            tests.append(test_name)
-            values.append(value)
-            
-            normal_range = normal_ranges[test_name]
-            if "min" in normal_range and "max" in normal_range:
-                lower_bounds.append(normal_range["min"])
-                upper_bounds.append(normal_range["max"])
-            else:
-                # 抗體檢測
-                lower_bounds.append(0)
-                upper_bounds.append(normal_range["max"])
-    
-    # 正常範圍
-    fig.add_trace(go.Scatter(
-        x=tests,
-        y=upper_bounds,
-        mode='lines',
-        name='正常上限',
-        line=dict(color='green', dash='dash')
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=tests,
-        y=lower_bounds,
-        mode='lines',
-        name='正常下限',
-        line=dict(color='green', dash='dash'),
-        fill='tonexty',
-        fillcolor='rgba(0,255,0,0.1)'
-    ))
-    
-    # 實際數值
-    fig.add_trace(go.Scatter(
-        x=tests,
-        y=values,
-        mode='markers+lines',
-        name='檢驗值',
-        marker=dict(size=10, color='blue'),
-        line=dict(color='blue', width=2)
-    ))
-    
-    fig.update_layout(
-        title="檢驗結果與正常範圍比較",
-        xaxis_title="檢驗項目",
-        yaxis_title="數值",
-        hovermode='x unified'
-    )
-    
-    return fig
+    return ui_helpers.create_lab_chart(lab_data)
 
-def create_lab_dataframe(lab_data: Dict[str, float], analyzer: ThyroidAnalyzer) -> pd.DataFrame:
-    """創建檢驗結果表格"""
-    lab_results = analyzer._parse_lab_results(lab_data)
-    
-    data = []
-    for test_name, result in lab_results.items():
-        data.append({
-            "檢驗項目": result.name,
-            "數值": f"{result.value} {result.unit}",
-            "參考範圍": result.reference_range,
-            "狀態": result.status
-        })
-    
-    df = pd.DataFrame(data)
-    return df
+@st.cache_data(show_spinner=False)
+def create_lab_dataframe(lab_data: Dict[str, float], _analyzer: ThyroidAnalyzer) -> pd.DataFrame:
+    """創建檢驗結果表格（_analyzer 不納入快取鍵）"""
+    return ui_helpers.create_lab_dataframe(lab_data, _analyzer)
 
 if __name__ == "__main__":
     main()
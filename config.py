@@ -2,6 +2,7 @@
 甲狀腺功能判讀系統配置檔
 """
 import os
+import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,16 +12,39 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     
     # 模型設定
-    EMBEDDING_MODEL = "text-embedding-ada-002"
+    # 預設使用本地 MiniLM 嵌入模型；更換嵌入模型後需刪除 VECTOR_DB_PATH 重建索引
+    EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    USE_OPENAI_EMBED = False
+    OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
     LLM_MODEL = "o4-mini"
+    LLM_MAX_CONCURRENCY = 8  # 同時進行的 LLM 請求上限
+    ANSWER_CACHE_TTL = 3600  # 相同查詢結果的快取秒數
+    ANSWER_CACHE_SIZE = 256
+    
+    # 是否在 Streamlit 介面啟用 RAG（需要 OpenAI API Key）
+    USE_RAG = os.getenv("USE_RAG", "false").lower() == "true"
     
     # 向量資料庫設定
     VECTOR_DB_PATH = "./data/vector_db"
+    # 向量儲存格式：QT_fp16 不需訓練；QT_8bit（int8）以首批向量訓練各維度範圍，之後加入的向量超出範圍會被截斷
+    FAISS_QUANTIZER = "QT_fp16"
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 200
+    MIN_CHUNK_SIZE = 100  # 短於此長度的片段併入前一片段
+    RETRIEVAL_TOP_K = 4
+    EMBEDDING_BATCH_SIZE = 512  # 每次嵌入請求的文字數量
+    EMBEDDING_MAX_CONCURRENCY = 8  # 同時進行的 OpenAI 嵌入請求上限
+    EMBEDDING_MAX_RETRIES = 5  # 遇到 429 等暫時性錯誤時的重試次數（指數退避）
+    
+    # 嵌入快取設定
+    EMBEDDING_CACHE_PATH = "./data/cache/emb_cache.db"
+    EMBEDDING_CACHE_TTL = 30 * 24 * 3600  # 秒，None 表示永不過期
+    SPLIT_CACHE_DIR = "./data/cache"  # 分割後文件片段的快取目錄
     
     # 文檔路徑
     DEFAULT_DOCUMENT_PATH = "./Thyroid function.md"
+    MAX_UPLOAD_SIZE = 100 * 1024 * 1024  # 上傳文件大小上限（位元組）
+    PDF_TABLE_PATH_THRESHOLD = 30  # 頁面繪圖路徑物件超過此數量時視為表格頁
     
     # 甲狀腺檢驗正常值範圍
     NORMAL_RANGES = {
@@ -32,6 +56,12 @@ class Config:
         "TSH_receptor_Ab": {"max": 1.75, "unit": "IU/L"}
     }
     
+    # 正常值範圍的陣列形式，順序同 LAB_TESTS（抗體檢測僅有上限，下限以 0 表示）
+    # 使用 float64 以確保邊界值（如 TSH 0.4）的比較結果與原始數值一致
+    LAB_TESTS = tuple(NORMAL_RANGES)
+    NORMAL_MINS = np.array([r.get("min", 0.0) for r in NORMAL_RANGES.values()], dtype=np.float64)
+    NORMAL_MAXS = np.array([r["max"] for r in NORMAL_RANGES.values()], dtype=np.float64)
+    
     # 應用程式設定
     APP_NAME = "甲狀腺功能智慧判讀系統"
     APP_VERSION = "1.0.0"
@@ -28,24 +28,30 @@ def initialize_documents():
     
     for source in source_files:
         if os.path.exists(source):
-            shutil.copy2(source, destination)
+            link_or_copy(source, destination)
             print(f"已複製 {source} 到 {destination}")
             break
     
-    # 刪除 RTF 檔案
-    rtf_files = [
-        "異常甲狀腺功能檢測的解讀與評估.md",
-        "./異常甲狀腺功能檢測的解讀與評估.md"
-    ]
+    # 刪除副檔名為 .md 但內容為 RTF 的檔案（單次掃描目錄）
+    for entry in os.scandir("."):
+        if entry.is_file() and entry.name.endswith('.md'):
+            with open(entry.path, 'rb') as f:
+                is_rtf = f.read(5) == b'{\\rtf'
+            if is_rtf:
+                os.remove(entry.path)
+                print(f"已刪除 RTF 檔案：{entry.path}")
+
+def link_or_copy(source: str, destination: str):
+    """以硬連結取代複製；跨檔案系統等無法建立連結時改為複製"""
+    if os.path.exists(destination):
+        if os.path.samefile(source, destination):
+            return
+        os.remove(destination)
     
-    for rtf_file in rtf_files:
-        if os.path.exists(rtf_file) and rtf_file.endswith('.md'):
-            # 檢查是否為 RTF 格式
-            with open(rtf_file, 'r', encoding='utf-8') as f:
-                first_line = f.readline()
-                if 'rtf1' in first_line:
-                    os.remove(rtf_file)
-                    print(f"已刪除 RTF 檔案：{rtf_file}")
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
 
 if __name__ == "__main__":
     initialize_documents() 
\ No newline at end of file
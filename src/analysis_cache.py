@@ -0,0 +1,52 @@
+"""
+分析結果快取
+以正規化後的 (檢驗數據, 症狀, 病人資訊) 為鍵，供各分析器共用
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+class AnalysisCache:
+    """
+    包裝 compute(lab_data, symptoms, info) 的 LRU 快取，每個分析器實例各自持有一個
+
+    檢驗數據與病人資訊依鍵排序，與字典的插入順序無關；含有不可雜湊的值（如清單）時
+    不經快取直接計算。相同輸入返回同一個結果物件，呼叫端不可修改
+    """
+
+    def __init__(self, compute: Callable[[Dict[str, float], List[str], Dict[str, Any]], T], maxsize: int):
+        self._compute = compute
+        self._cached = lru_cache(maxsize=maxsize)(self._compute_from_items)
+
+    def __call__(
+        self,
+        lab_data: Dict[str, float],
+        symptoms: Optional[List[str]] = None,
+        info: Optional[Dict[str, Any]] = None
+    ) -> T:
+        key = (
+            tuple(sorted(lab_data.items())),
+            tuple(symptoms or ()),
+            tuple(sorted((info or {}).items()))
+        )
+        try:
+            hash(key)
+        except TypeError:
+            # 含有不可雜湊的值（如清單），不經快取直接計算
+            return self._compute(lab_data, symptoms, info)
+
+        return self._cached(*key)
+
+    def clear(self):
+        """清除所有快取結果"""
+        self._cached.cache_clear()
+
+    def _compute_from_items(
+        self,
+        lab_items: Tuple[Tuple[str, float], ...],
+        symptom_items: Tuple[str, ...],
+        info_items: Tuple[Tuple[str, Any], ...]
+    ) -> T:
+        """由快取鍵還原輸入後計算"""
+        return self._compute(dict(lab_items), list(symptom_items), dict(info_items))
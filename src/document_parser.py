@@ -2,30 +2,182 @@
 醫學文檔解析器
 支援 Markdown、PDF、TXT 等格式的文獻解析
 """
-import re
-import json
+import orjson
+import regex as re
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache, cached_property
 from pathlib import Path
 import markdown
 from bs4 import BeautifulSoup
 
-@dataclass
+# 解析器版本：解析規則或知識庫內容的產生方式改變時遞增，使依解析結果建立的快取失效
+PARSER_VERSION = 1
+
+# 參考值範圍：(檢驗項目, 單位, 是否有下限, 正規表示式)
+# 各式以具名群組擷取數值，群組名稱為「檢驗項目_min/_max」
+_REFERENCE_RANGE_SPECS = (
+    ("TSH", "μIU/mL", True, r'TSH[^0-9]*(?P<TSH_min>[0-9.]+)[^0-9]+(?P<TSH_max>[0-9.]+)\s*μIU/mL'),
+    ("Free_T4", "ng/dL", True, r'Free T4[^0-9]*(?P<Free_T4_min>[0-9.]+)[^0-9]+(?P<Free_T4_max>[0-9.]+)\s*ng/dL'),
+    ("Free_T3", "pg/mL", True, r'Free T3[^0-9]*(?P<Free_T3_min>[0-9.]+)[^0-9]+(?P<Free_T3_max>[0-9.]+)\s*pg/mL'),
+    ("Anti_TPO", "IU/mL", False, r'Anti-TPO[^0-9]*<\s*(?P<Anti_TPO_max>[0-9.]+)\s*IU/mL'),
+    ("Anti_Tg", "IU/mL", False, r'Anti-Tg[^0-9]*<\s*(?P<Anti_Tg_max>[0-9.]+)\s*IU/mL'),
+    ("TSH_receptor_Ab", "IU/L", False, r'TSH[^受體]*受體抗體[^0-9]*<\s*(?P<TSH_receptor_Ab_max>[0-9.]+)\s*IU/L')
+)
+
+class _Patterns:
+    """
+    解析用的正規表示式，首次使用時才編譯
+    
+    只載入已解析知識庫（如 LiteratureBasedAnalyzer）的程式路徑匯入本模組時不需付出編譯成本
+    """
+    
+    # 章節切分
+    @cached_property
+    def pattern_section_re(self):
+        return re.compile(r'(\*\*2\.2.*?不同甲狀腺功能檢測模式.*?\*\*.*?)(?=\*\*3\.|$)', re.DOTALL)
+    
+    @cached_property
+    def subpattern_re(self):
+        return re.compile(r'(\*\*2\.2\.\d+.*?\*\*.*?)(?=\*\*2\.2\.\d+|\*\*3\.|$)', re.DOTALL)
+    
+    @cached_property
+    def qa_section_re(self):
+        return re.compile(r'(\*\*4.*?問答環節\*\*.*?)(?=\*\*\[重點摘要\]|$)', re.DOTALL)
+    
+    @cached_property
+    def summary_re(self):
+        return re.compile(r'(\*\*3.*?總結與建議\*\*.*?)(?=\*\*4\.|$)', re.DOTALL)
+    
+    # 模式章節內的欄位
+    # 內容部分以 [^*]*+(?:\*(?!...)[^*]*+)*+ 展開並使用佔有量詞，每個字元最多檢查兩次且不會回溯
+    @cached_property
+    def title_re(self):
+        return re.compile(r'\*\*2\.2\.\d+\s+(.*?)\*\*')
+    
+    # 常見原因/潛在干擾/其他可能性/藥物影響 共用同一結束條件，合併為單次掃描
+    @cached_property
+    def section_fields_re(self):
+        return re.compile(
+            r'\*\*(?P<field>常見原因|潛在干擾|其他可能性|藥物影響)[：:]\*\*(?P<body>[^*]*+(?:\*(?!\*)[^*]*+)*+)'
+        )
+    
+    @cached_property
+    def case_with_dx_re(self):
+        # 案例內容直到下一個案例或「_診斷：_」，診斷取該標記後的同一行
+        return re.compile(
+            r'\*\*案例[一二三四五六七八九十\d]+[：:]\*\*(?P<body>[^*_]*+(?:(?:\*(?!\*案例)|_(?!診斷[：:]_))[^*_]*+)*+)'
+            r'(?:_診斷[：:]_\s*(?P<dx>[^\n]*))?'
+        )
+    
+    @cached_property
+    def eval_re(self):
+        return re.compile(r'\*\*[^*]*評估流程[：:]\*\*([^*]*+(?:\*(?!\*\d+\.)[^*]*+)*+)')
+    
+    @cached_property
+    def diff_re(self):
+        return re.compile(r'\*\*鑑別診斷流程[：:]\*\*([^*]*+(?:\*(?!\*TSH)[^*]*+)*+)')
+    
+    # 列表與步驟
+    @cached_property
+    def bullet_title_re(self):
+        # 單行的「- **標題**：」，其後為項目內容
+        return re.compile(r'[-*]\s+\*\*(.*?)\*\*[：:]?')
+    
+    @cached_property
+    def cond_step_re(self):
+        return re.compile(r'\*\*(.*?)[：:]\*\*\s*([^*]*+(?:\*(?!\*)[^*]*+)*+)', re.DOTALL)
+    
+    # 問答對：**Q1：** ... **A1：** ...
+    @cached_property
+    def qa_pair_re(self):
+        return re.compile(
+            r'\*\*Q(\d+)[：:]\*\*\s*([^*]*+(?:\*(?!\*A\1[：:]\*\*)[^*]*+)*+)\*\*A\1[：:]\*\*\s*([^*]*+(?:\*(?!\*Q\d+[：:])[^*]*+)*+)'
+        )
+    
+    @cached_property
+    def reference_range_res(self):
+        """各檢驗項目的參考值正規表示式"""
+        return {test: re.compile(pattern) for test, _, _, pattern in _REFERENCE_RANGE_SPECS}
+
+_P = _Patterns()
+
+@lru_cache(maxsize=None)
+def _reference_range_re(tests: Tuple[str, ...]):
+    """組合指定檢驗項目的參考值正規表示式，包在前瞻 (?=...) 中以免消耗重疊的提及"""
+    alternatives = [pattern for test, _, _, pattern in _REFERENCE_RANGE_SPECS if test in tests]
+    return re.compile(r'(?=' + '|'.join(alternatives) + ')')
+
+def _bullet_marker(line: str) -> Optional[int]:
+    """
+    判斷無序列表行（- 或 * 開頭）
+    
+    Returns:
+        None 表示一般行；-1 表示只結束前一個項目；其餘為項目內容的起始位置
+    """
+    if line[:1] not in ('-', '*') or not line:
+        return None
+    return 2 if line[1:2].isspace() else -1
+
+def _ordered_marker(line: str) -> Optional[int]:
+    """判斷有序列表行（數字加句點開頭），返回值同 _bullet_marker"""
+    end = 0
+    while end < len(line) and line[end].isdecimal():
+        end += 1
+    if end == 0 or line[end:end + 1] != '.':
+        return None
+    return end + 2 if line[end + 1:end + 2].isspace() else -1
+
+def _split_list_blocks(lines: List[str], marker) -> List[str]:
+    """依列表標記逐行切分項目，項目包含其後的續行直到下一個標記行"""
+    blocks = []
+    current = None
+    
+    for line in lines:
+        start = marker(line)
+        if start is None:
+            if current is not None:
+                current.append(line)
+            continue
+        
+        if current is not None:
+            blocks.append('\n'.join(current))
+        current = [line[start:]] if start >= 0 else None
+    
+    if current is not None:
+        blocks.append('\n'.join(current))
+    
+    return blocks
+
+def _nested_main_marker(line: str) -> Optional[int]:
+    """判斷嵌套列表的主要項目行（行首 - 或 *），返回值同 _bullet_marker，項目保留整行"""
+    if line[:1] not in ('-', '*') or not line:
+        return None
+    return 0 if _P.bullet_title_re.match(line) else -1
+
+def _nested_sub_marker(line: str) -> Optional[int]:
+    """判斷嵌套列表的子項目行（縮排後 - 或 *），返回值同 _nested_main_marker"""
+    stripped = line.lstrip()
+    if not line[:1].isspace() or stripped[:1] not in ('-', '*') or not stripped:
+        return None
+    return 0 if _P.bullet_title_re.match(stripped) else -1
+
+@dataclass(slots=True)
 class ThyroidPattern:
     """甲狀腺功能模式"""
     pattern_id: str
     tsh_status: str  # 低/正常/高
     ft4_status: str  # 低/正常/高
     ft3_status: Optional[str] = None
-    common_causes: List[str] = None
-    interfering_factors: List[str] = None
-    differential_diagnosis: List[str] = None
-    recommendations: List[str] = None
-    additional_tests: List[str] = None
-    case_examples: List[Dict[str, str]] = None
+    common_causes: List[str] = field(default_factory=list)
+    interfering_factors: List[str] = field(default_factory=list)
+    differential_diagnosis: List[str] = field(default_factory=list)
+    recommendations: List[str] = field(default_factory=list)
+    additional_tests: List[str] = field(default_factory=list)
+    case_examples: List[Dict[str, str]] = field(default_factory=list)
     notes: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class ClinicalGuideline:
     """臨床指南"""
     condition: str
@@ -71,41 +223,25 @@ class MarkdownDocumentParser:
         
         # 分割主要章節
         # 2.2 不同甲狀腺功能檢測模式的解讀與評估
-        pattern_section = re.search(
-            r'(\*\*2\.2.*?不同甲狀腺功能檢測模式.*?\*\*.*?)(?=\*\*3\.|$)', 
-            content, 
-            re.DOTALL
-        )
+        pattern_section = _P.pattern_section_re.search(content)
         
         if pattern_section:
             pattern_content = pattern_section.group(1)
             
             # 提取各個子模式 (2.2.1 - 2.2.7)
-            pattern_matches = re.findall(
-                r'(\*\*2\.2\.\d+.*?\*\*.*?)(?=\*\*2\.2\.\d+|\*\*3\.|$)',
-                pattern_content,
-                re.DOTALL
-            )
+            pattern_matches = _P.subpattern_re.findall(pattern_content)
             
             for i, match in enumerate(pattern_matches):
                 sections[f"pattern_{i+1}"] = match
         
         # 提取問答環節
-        qa_section = re.search(
-            r'(\*\*4.*?問答環節\*\*.*?)(?=\*\*\[重點摘要\]|$)',
-            content,
-            re.DOTALL
-        )
+        qa_section = _P.qa_section_re.search(content)
         
         if qa_section:
             sections["qa_section"] = qa_section.group(1)
         
         # 提取總結與建議
-        summary_section = re.search(
-            r'(\*\*3.*?總結與建議\*\*.*?)(?=\*\*4\.|$)',
-            content,
-            re.DOTALL
-        )
+        summary_section = _P.summary_re.search(content)
         
         if summary_section:
             sections["summary"] = summary_section.group(1)
@@ -150,78 +286,46 @@ class MarkdownDocumentParser:
         pattern = ThyroidPattern(
             pattern_id=section_num,
             tsh_status=tsh_status,
-            ft4_status=ft4_status,
-            common_causes=[],
-            interfering_factors=[],
-            differential_diagnosis=[],
-            recommendations=[],
-            additional_tests=[],
-            case_examples=[]
+            ft4_status=ft4_status
         )
         
         # 提取標題
-        title_match = re.search(r'\*\*2\.2\.\d+\s+(.*?)\*\*', section_text)
+        title_match = _P.title_re.search(section_text)
         if title_match:
             pattern.notes = title_match.group(1).strip()
         
+        # 單次掃描欄位，同名欄位以第一次出現者為準
+        fields = {}
+        for field_match in _P.section_fields_re.finditer(section_text):
+            fields.setdefault(field_match.group('field'), field_match.group('body'))
+        
         # 提取常見原因
-        causes_match = re.search(
-            r'\*\*常見原因[：:]\*\*(.*?)(?=\*\*|$)', 
-            section_text, 
-            re.DOTALL
-        )
-        if causes_match:
-            pattern.common_causes = self._extract_list_items_markdown(causes_match.group(1))
+        if '常見原因' in fields:
+            pattern.common_causes = self._extract_list_items_markdown(fields['常見原因'])
         
         # 提取潛在干擾
-        interference_match = re.search(
-            r'\*\*潛在干擾[：:]\*\*(.*?)(?=\*\*|$)', 
-            section_text, 
-            re.DOTALL
-        )
-        if interference_match:
-            pattern.interfering_factors = self._extract_nested_items_markdown(interference_match.group(1))
+        if '潛在干擾' in fields:
+            pattern.interfering_factors = self._extract_nested_items_markdown(fields['潛在干擾'])
         
         # 提取其他可能性
-        other_match = re.search(
-            r'\*\*其他可能性[：:]\*\*(.*?)(?=\*\*|$)', 
-            section_text, 
-            re.DOTALL
-        )
-        if other_match:
-            pattern.differential_diagnosis = self._extract_nested_items_markdown(other_match.group(1))
+        if '其他可能性' in fields:
+            pattern.differential_diagnosis = self._extract_nested_items_markdown(fields['其他可能性'])
         
         # 提取藥物影響
-        drug_match = re.search(
-            r'\*\*藥物影響[：:]\*\*(.*?)(?=\*\*|$)', 
-            section_text, 
-            re.DOTALL
-        )
-        if drug_match:
-            drugs = self._extract_list_items_markdown(drug_match.group(1))
+        if '藥物影響' in fields:
+            drugs = self._extract_list_items_markdown(fields['藥物影響'])
             pattern.interfering_factors.extend([f"藥物影響: {drug}" for drug in drugs])
         
-        # 提取案例
-        case_matches = re.findall(
-            r'\*\*案例[一二三四五六七八九十\d]+[：:]\*\*(.*?)(?=\*\*案例|_診斷[：:]_|$)',
-            section_text,
-            re.DOTALL
-        )
-        
-        for case_text in case_matches:
-            diagnosis_match = re.search(r'_診斷[：:]_\s*(.*?)(?=\n|$)', case_text)
-            if diagnosis_match:
+        # 提取案例（單次掃描同時取得診斷）
+        for case_match in _P.case_with_dx_re.finditer(section_text):
+            if case_match.group('dx') is not None:
                 pattern.case_examples.append({
-                    "description": case_text.strip(),
-                    "diagnosis": diagnosis_match.group(1).strip()
+                    "description": case_match.group('body').strip(),
+                    "diagnosis": case_match.group('dx').strip()
                 })
         
         # 提取評估流程
-        eval_match = re.search(
-            r'\*\*.*?評估流程[：:]\*\*(.*?)(?=\*\*\d+\.|$)',
-            section_text,
-            re.DOTALL
-        )
+        eval_match = _P.eval_re.search(section_text)
         if eval_match:
             pattern.recommendations = self._extract_evaluation_steps(eval_match.group(1))
         
@@ -231,11 +335,7 @@ class MarkdownDocumentParser:
             pattern.ft4_status = "高或正常"
             
             # 提取鑑別診斷流程
-            diff_match = re.search(
-                r'\*\*鑑別診斷流程[：:]\*\*(.*?)(?=\*\*TSH|$)',
-                section_text,
-                re.DOTALL
-            )
+            diff_match = _P.diff_re.search(section_text)
             if diff_match:
                 pattern.additional_tests = self._extract_nested_items_markdown(diff_match.group(1))
         
@@ -247,27 +347,22 @@ class MarkdownDocumentParser:
         
         # 清理文本
         text = text.strip()
+        lines = text.split('\n')
         
         # 匹配 Markdown 列表格式
         # - 項目
         # * 項目
         # 1. 項目
-        patterns = [
-            r'^[-\*]\s+(.+?)(?=^[-\*]|\Z)',  # 無序列表
-            r'^\d+\.\s+(.+?)(?=^\d+\.|\Z)',  # 有序列表
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.MULTILINE | re.DOTALL)
-            for match in matches:
+        for marker in (_bullet_marker, _ordered_marker):
+            for item in _split_list_blocks(lines, marker):
                 # 清理並添加項目
-                item = match.strip()
+                item = item.strip()
                 if item and len(item) > 5:  # 過濾太短的項目
                     items.append(item)
         
         # 如果沒有找到列表，嘗試按句號分割
         if not items:
-            sentences = re.split(r'。', text)
+            sentences = text.split('。')
             items = [s.strip() + '。' for s in sentences if s.strip() and len(s.strip()) > 10]
         
         return items
@@ -276,18 +371,20 @@ class MarkdownDocumentParser:
         """提取嵌套的 Markdown 項目（包含子項目）"""
         items = []
         
-        # 先提取主要項目
-        main_items = re.findall(r'^[-\*]\s+\*\*(.*?)\*\*[：:]?(.*?)(?=^[-\*]|\Z)', text, re.MULTILINE | re.DOTALL)
-        
-        for title, content in main_items:
+        # 逐行切分主要項目：行首的 - 或 * 結束前一項目，「- **標題**」開始新項目
+        for block in _split_list_blocks(text.split('\n'), _nested_main_marker):
+            title_match = _P.bullet_title_re.match(block)
+            content = block[title_match.end():]
+            
             # 組合標題和內容
-            full_item = f"{title.strip()}: {content.strip()}"
+            full_item = f"{title_match.group(1).strip()}: {content.strip()}"
             items.append(full_item)
             
-            # 提取子項目
-            sub_items = re.findall(r'^\s+[-\*]\s+\*\*(.*?)\*\*[：:]?\s*(.*?)(?=^\s+[-\*]|^[-\*]|\Z)', content, re.MULTILINE | re.DOTALL)
-            for sub_title, sub_content in sub_items:
-                items.append(f"  - {sub_title.strip()}: {sub_content.strip()}")
+            # 提取子項目：縮排的 - 或 * 結束前一子項目
+            for sub_block in _split_list_blocks(content.split('\n'), _nested_sub_marker):
+                sub_block = sub_block.lstrip()
+                sub_match = _P.bullet_title_re.match(sub_block)
+                items.append(f"  - {sub_match.group(1).strip()}: {sub_block[sub_match.end():].strip()}")
         
         # 如果沒有找到嵌套格式，使用簡單提取
         if not items:
@@ -301,11 +398,7 @@ class MarkdownDocumentParser:
         
         # 提取帶有條件的步驟
         # 格式: **條件：** 動作
-        condition_steps = re.findall(
-            r'\*\*(.*?)[：:]\*\*\s*(.*?)(?=\*\*|$)',
-            text,
-            re.DOTALL
-        )
+        condition_steps = _P.cond_step_re.findall(text)
         
         for condition, action in condition_steps:
             step = f"{condition.strip()}: {action.strip()}"
@@ -325,12 +418,7 @@ class MarkdownDocumentParser:
             qa_text = sections["qa_section"]
             
             # 匹配 **Q1：** ... **A1：** ... 格式
-            qa_pattern = re.compile(
-                r'\*\*Q(\d+)[：:]\*\*\s*(.*?)\s*\*\*A\1[：:]\*\*\s*(.*?)(?=\*\*Q\d+[：:]|$)', 
-                re.DOTALL
-            )
-            
-            matches = qa_pattern.findall(qa_text)
+            matches = _P.qa_pair_re.findall(qa_text)
             for match in matches:
                 qa_num, question, answer = match
                 qa_pairs.append({
@@ -343,77 +431,55 @@ class MarkdownDocumentParser:
     
     def _extract_reference_ranges(self, content: str) -> Dict[str, Dict[str, Any]]:
         """提取參考值範圍"""
-        reference_ranges = {}
+        # 從文本中提取提到的參考值，例如 TSH: 0.4-4.0 μIU/mL、Anti-TPO < 34 IU/mL
+        # 單位沒有出現在文件中的項目不可能匹配，不納入掃描
+        tests = tuple(test for test, unit, _, _ in _REFERENCE_RANGE_SPECS if unit in content)
+        if not tests:
+            return {}
+        
+        # 單次掃描，每個項目以第一次出現者為準
+        # 交替式在同一位置只會回報一個分支（如 TSH 與 TSH 受體抗體），命中時補查其餘項目
+        found = {}
+        for match in _reference_range_re(tests).finditer(content):
+            start = match.start()
+            for test in tests:
+                if test not in found:
+                    hit = _P.reference_range_res[test].match(content, start)
+                    if hit:
+                        found[test] = hit
+            if len(found) == len(tests):
+                break
         
-        # 從文本中提取提到的參考值
-        # TSH: 0.4-4.0 μIU/mL
-        tsh_range = re.search(r'TSH[^0-9]*([0-9.]+)[^0-9]+([0-9.]+)\s*μIU/mL', content)
-        if tsh_range:
-            reference_ranges["TSH"] = {
-                "min": float(tsh_range.group(1)),
-                "max": float(tsh_range.group(2)),
-                "unit": "μIU/mL"
-            }
-        
-        # Free T4: 0.8-1.8 ng/dL
-        ft4_range = re.search(r'Free T4[^0-9]*([0-9.]+)[^0-9]+([0-9.]+)\s*ng/dL', content)
-        if ft4_range:
-            reference_ranges["Free_T4"] = {
-                "min": float(ft4_range.group(1)),
-                "max": float(ft4_range.group(2)),
-                "unit": "ng/dL"
-            }
-        
-        # Free T3: 2.3-4.2 pg/mL
-        ft3_range = re.search(r'Free T3[^0-9]*([0-9.]+)[^0-9]+([0-9.]+)\s*pg/mL', content)
-        if ft3_range:
-            reference_ranges["Free_T3"] = {
-                "min": float(ft3_range.group(1)),
-                "max": float(ft3_range.group(2)),
-                "unit": "pg/mL"
-            }
-        
-        # 抗體參考值（通常只有上限）
-        antibody_patterns = [
-            (r'Anti-TPO[^0-9]*<\s*([0-9.]+)\s*IU/mL', "Anti_TPO"),
-            (r'Anti-Tg[^0-9]*<\s*([0-9.]+)\s*IU/mL', "Anti_Tg"),
-            (r'TSH[^受體]*受體抗體[^0-9]*<\s*([0-9.]+)\s*IU/L', "TSH_receptor_Ab")
-        ]
-        
-        for pattern, name in antibody_patterns:
-            match = re.search(pattern, content)
-            if match:
-                reference_ranges[name] = {
-                    "max": float(match.group(1)),
-                    "unit": "IU/mL" if name != "TSH_receptor_Ab" else "IU/L"
+        reference_ranges = {}
+        for test, unit, has_min, _ in _REFERENCE_RANGE_SPECS:
+            match = found.get(test)
+            if match is None:
+                continue
+            
+            # 抗體參考值通常只有上限
+            if has_min:
+                reference_ranges[test] = {
+                    "min": float(match.group(f"{test}_min")),
+                    "max": float(match.group(f"{test}_max")),
+                    "unit": unit
+                }
+            else:
+                reference_ranges[test] = {
+                    "max": float(match.group(f"{test}_max")),
+                    "unit": unit
                 }
         
         return reference_ranges
     
     def save_parsed_knowledge(self, parsed_data: Dict[str, Any], output_path: str):
         """保存解析後的知識庫"""
-        # 轉換為可序列化的格式
-        serializable_data = {
-            "patterns": [self._pattern_to_dict(p) for p in parsed_data["patterns"]],
+        with open(output_path, 'wb') as f:
+            f.write(self.dump_parsed_knowledge(parsed_data))
+    
+    def dump_parsed_knowledge(self, parsed_data: Dict[str, Any]) -> bytes:
+        """序列化知識庫（緊湊格式；ThyroidPattern 由 orjson 直接依欄位順序序列化）"""
+        return orjson.dumps({
+            "patterns": parsed_data["patterns"],
             "qa_pairs": parsed_data["qa_pairs"],
             "reference_ranges": parsed_data.get("reference_ranges", {})
-        }
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(serializable_data, f, ensure_ascii=False, indent=2)
-    
-    def _pattern_to_dict(self, pattern: ThyroidPattern) -> Dict[str, Any]:
-        """將 ThyroidPattern 轉換為字典"""
-        return {
-            "pattern_id": pattern.pattern_id,
-            "tsh_status": pattern.tsh_status,
-            "ft4_status": pattern.ft4_status,
-            "ft3_status": pattern.ft3_status,
-            "common_causes": pattern.common_causes or [],
-            "interfering_factors": pattern.interfering_factors or [],
-            "differential_diagnosis": pattern.differential_diagnosis or [],
-            "recommendations": pattern.recommendations or [],
-            "additional_tests": pattern.additional_tests or [],
-            "case_examples": pattern.case_examples or [],
-            "notes": pattern.notes
-        } 
\ No newline at end of file
+        })
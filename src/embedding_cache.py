@@ -0,0 +1,124 @@
+"""
+嵌入向量快取
+以「SHA-256(文字)|模型名稱」為鍵，將嵌入向量持久化於 SQLite
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+
+# SQLite 單一查詢的參數數量上限
+_SQLITE_BATCH = 500
+
+class EmbeddingCache:
+    def __init__(self, db_path: str, provider: str, model: str, ttl: Optional[float] = None):
+        """
+        初始化嵌入向量快取
+
+        Args:
+            db_path: SQLite 資料庫路徑
+            provider: 嵌入服務提供者
+            model: 嵌入模型名稱（納入雜湊，換模型即自動失效）
+            ttl: 快取有效秒數，None 表示永不過期
+        """
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.provider = provider
+        self.model = model
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "hash TEXT PRIMARY KEY, provider TEXT, model TEXT, vec BLOB, created_at REAL)"
+        )
+        self._conn.commit()
+
+    def hash_text(self, text: str) -> str:
+        """計算文字的快取鍵（內容雜湊與模型名稱以 | 分隔，避免兩者串接後產生碰撞）"""
+        return f"{hashlib.sha256(text.encode('utf-8')).hexdigest()}|{self.model}"
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """查詢單一向量"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """批次查詢向量，只返回命中的項目"""
+        unique_keys = list(dict.fromkeys(keys))
+        min_created = time.time() - self.ttl if self.ttl else 0.0
+        found = {}
+
+        with self._lock:
+            for start in range(0, len(unique_keys), _SQLITE_BATCH):
+                batch = unique_keys[start:start + _SQLITE_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vec FROM embeddings "
+                    f"WHERE hash IN ({placeholders}) AND created_at >= ?",
+                    (*batch, min_created)
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+            hit_count = sum(1 for key in keys if key in found)
+            self.hits += hit_count
+            self.misses += len(keys) - hit_count
+
+        return found
+
+    def put_many(self, keys: Sequence[str], vectors: Sequence[np.ndarray]):
+        """批次寫入向量"""
+        now = time.time()
+        rows = [
+            (key, self.provider, self.model, np.asarray(vec, dtype=np.float32).tobytes(), now)
+            for key, vec in zip(keys, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, provider, model, vec, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """快取命中統計"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+class CachedEmbeddings(Embeddings):
+    """在嵌入模型前加上持久化快取，只對未命中的文字呼叫模型"""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.cache.hash_text(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # 未命中的文字（去除重複）
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        if missing:
+            new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = [np.asarray(vec, dtype=np.float32) for vec in new_vectors]
+            self.cache.put_many(list(missing.keys()), new_vectors)
+            vectors.update(zip(missing.keys(), new_vectors))
+
+        return [vectors[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
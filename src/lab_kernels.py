@@ -0,0 +1,40 @@
+"""
+檢驗數值批次判讀的 Numba 核心
+狀態代碼同 ThyroidAnalyzer.analyze_batch：0 正常、1 偏低、2 偏高、3 未檢驗（NaN）
+"""
+import numpy as np
+from numba import njit, prange
+
+@njit(parallel=True, cache=True)
+def classify(values, mins, maxs, out):
+    """
+    逐格比較 (病人數, 項目數) 數值矩陣與各項目上下限，將狀態代碼寫入 out
+
+    不使用 fastmath：該選項假設沒有 NaN，會使未檢驗的判斷失效
+    """
+    for i in prange(values.shape[0]):
+        for j in range(values.shape[1]):
+            v = values[i, j]
+            if v != v:
+                out[i, j] = 3
+            elif v < mins[j]:
+                out[i, j] = 1
+            elif v > maxs[j]:
+                out[i, j] = 2
+            else:
+                out[i, j] = 0
+
+def classify_lab_values(values: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+    """判讀數值矩陣，返回 int8 狀態代碼矩陣"""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    out = np.empty(values.shape, dtype=np.int8)
+    classify(
+        values,
+        np.ascontiguousarray(mins, dtype=np.float64),
+        np.ascontiguousarray(maxs, dtype=np.float64),
+        out
+    )
+    return out
+
+# 匯入時先以小矩陣觸發編譯（或載入磁碟快取），避免首次批次判讀承擔編譯時間
+classify_lab_values(np.zeros((1, 1)), np.zeros(1), np.ones(1))
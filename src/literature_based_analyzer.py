@@ -2,13 +2,49 @@
 基於文獻的甲狀腺功能判讀引擎
 完全依據上傳的醫學文獻進行判讀，不使用預設規則
 """
-import json
-from typing import Dict, List, Any, Optional, Tuple
+import orjson
+import heapq
+from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 from pathlib import Path
 import numpy as np
+from src.analysis_cache import AnalysisCache
 
-@dataclass
+# 從文獻中提取的參考範圍，陣列欄位順序與 _TEST_NAMES 一致
+# 抗體項目只有陽性閾值，其上下限以 nan 表示；反之亦然
+_TEST_NAMES = np.array(["TSH", "Free_T4", "Free_T3", "Anti_TPO", "Anti_Tg", "TSH_receptor_Ab"])
+_LOWS = np.array([0.4, 0.8, 2.3, np.nan, np.nan, np.nan])
+_HIGHS = np.array([4.0, 1.8, 4.2, np.nan, np.nan, np.nan])
+_THRESH = np.array([np.nan, np.nan, np.nan, 34, 115, 1.75])
+_IS_ANTIBODY = ~np.isnan(_THRESH)
+
+# 單筆字典判讀用的純量查表，少量數值時比建立陣列快
+_LOW = {test: float(low) for test, low in zip(_TEST_NAMES.tolist(), _LOWS) if not np.isnan(low)}
+_HIGH = {test: float(high) for test, high in zip(_TEST_NAMES.tolist(), _HIGHS) if not np.isnan(high)}
+_THRESHOLD = {test: float(thresh) for test, thresh in zip(_TEST_NAMES.tolist(), _THRESH) if not np.isnan(thresh)}
+
+# 病因關鍵字與對應的抗體項目，抗體陽性時提高該病因的相關性
+_CAUSE_BOOST_MARKERS = (("Graves", "TSH_receptor_Ab"), ("橋本", "Anti_TPO"))
+
+# 用藥中代表 Biotin 的字詞（比對前先轉小寫）
+_BIOTIN_TOKENS = ("biotin", "生物素")
+
+# 問答主題位元：(問題關鍵字, 檢驗項目, 位元)
+_QA_TOPICS = (("tsh", "TSH", 1), ("t4", "Free_T4", 2), ("t3", "Free_T3", 4))
+
+# 最多返回的相關問答數量
+_MAX_RELEVANT_QA = 2
+
+# 每個分析器保留的分析結果數量
+_ANALYSIS_CACHE_SIZE = 256
+
+def _classify_lab_values(values: np.ndarray) -> np.ndarray:
+    """以向量比較判斷檢驗狀態，values 的欄位順序同 _TEST_NAMES"""
+    range_status = np.where(values < _LOWS, "低", np.where(values > _HIGHS, "高", "正常"))
+    antibody_status = np.where(values > _THRESH, "陽性", "陰性")
+    return np.where(_IS_ANTIBODY, antibody_status, range_status)
+
+@dataclass(slots=True)
 class LiteratureBasedDiagnosis:
     """基於文獻的診斷結果"""
     pattern_match: str  # 匹配的模式描述
@@ -20,6 +56,7 @@ class LiteratureBasedDiagnosis:
     supporting_literature: List[str]  # 支持的文獻來源
     confidence_score: float
     special_notes: Optional[str] = None
+    lab_status: Dict[str, str] = None  # 各檢驗項目的判讀狀態，供報告重用
 
 class LiteratureBasedAnalyzer:
     def __init__(self, knowledge_base_path: str = None):
@@ -34,17 +71,58 @@ class LiteratureBasedAnalyzer:
         self.guidelines = []
         self.qa_pairs = []
         
+        # 模式查找索引（於載入知識庫時建立）
+        self._pair_index = {}
+        self._pattern_index = {}
+        self._tsh_index = {}
+        
+        # 分析結果快取，以正規化後的輸入為鍵；重新載入知識庫時清除
+        self._analysis_cache = AnalysisCache(self._analyze, _ANALYSIS_CACHE_SIZE)
+        
         if knowledge_base_path and Path(knowledge_base_path).exists():
             self.load_knowledge_base(knowledge_base_path)
     
     def load_knowledge_base(self, path: str):
         """載入解析後的知識庫"""
-        with open(path, 'r', encoding='utf-8') as f:
-            self.knowledge_base = json.load(f)
+        with open(path, 'rb') as f:
+            self.knowledge_base = orjson.loads(f.read())
         
         self.patterns = self.knowledge_base.get("patterns", [])
         self.guidelines = self.knowledge_base.get("guidelines", [])
         self.qa_pairs = self.knowledge_base.get("qa_pairs", [])
+        self._build_pattern_index()
+        self.clear_cache()
+        
+        # 預先計算每個問答涉及的檢驗主題
+        for qa in self.qa_pairs:
+            question = qa.get("question", "").lower()
+            qa["_topic_mask"] = sum(bit for token, _, bit in _QA_TOPICS if token in question)
+    
+    def _build_pattern_index(self):
+        """建立模式查找索引與病因加權表，同鍵以文獻中先出現的模式為準"""
+        self._pair_index = {}
+        self._pattern_index = {}
+        self._tsh_index = {}
+        
+        for position, pattern in enumerate(self.patterns):
+            pattern["_cause_boosts"] = self._build_cause_boosts(pattern.get("common_causes", []))
+            
+            tsh_status = pattern.get("tsh_status")
+            ft4_status = pattern.get("ft4_status")
+            ft3_status = pattern.get("ft3_status") or None
+            
+            self._pair_index.setdefault((tsh_status, ft4_status), pattern)
+            # 保留原始順序，供 T3 比對時選出最早出現的模式
+            self._pattern_index.setdefault((tsh_status, ft4_status, ft3_status), (position, pattern))
+            self._tsh_index.setdefault(tsh_status, pattern)
+    
+    @staticmethod
+    def _build_cause_boosts(common_causes: List[str]) -> List[Tuple[str, Tuple[str, ...]]]:
+        """為每個常見原因預先找出可提高分數的抗體項目"""
+        return [
+            (cause, tuple(key for marker, key in _CAUSE_BOOST_MARKERS if marker in cause))
+            for cause in common_causes
+        ]
     
     def analyze_from_literature(
         self, 
@@ -61,8 +139,21 @@ class LiteratureBasedAnalyzer:
             patient_info: 患者資訊（年齡、性別、用藥等）
             
         Returns:
-            基於文獻的診斷結果
+            基於文獻的診斷結果（相同輸入共用同一個快取結果，請勿修改）
         """
+        return self._analysis_cache(lab_data, symptoms, patient_info)
+    
+    def clear_cache(self):
+        """清除分析結果快取"""
+        self._analysis_cache.clear()
+    
+    def _analyze(
+        self,
+        lab_data: Dict[str, float],
+        symptoms: List[str],
+        patient_info: Dict[str, Any]
+    ) -> LiteratureBasedDiagnosis:
+        """執行基於文獻的分析流程"""
         # 1. 判斷檢驗值狀態
         lab_status = self._determine_lab_status(lab_data)
         
@@ -105,36 +196,38 @@ class LiteratureBasedAnalyzer:
             additional_tests=additional_tests,
             supporting_literature=["異常甲狀腺功能檢測的解讀與評估"],
             confidence_score=confidence,
-            special_notes=special_notes
+            special_notes=special_notes,
+            lab_status=lab_status
         )
     
-    def _determine_lab_status(self, lab_data: Dict[str, float]) -> Dict[str, str]:
-        """根據文獻中的參考值判斷檢驗狀態"""
-        status = {}
+    def _determine_lab_status(
+        self,
+        lab_data: Union[Dict[str, float], np.ndarray]
+    ) -> Union[Dict[str, str], np.ndarray]:
+        """
+        根據文獻中的參考值判斷檢驗狀態
         
-        # 從文獻中提取的參考範圍
-        reference_ranges = {
-            "TSH": {"low": 0.4, "high": 4.0},
-            "Free_T4": {"low": 0.8, "high": 1.8},
-            "Free_T3": {"low": 2.3, "high": 4.2},
-            "Anti_TPO": {"threshold": 34},
-            "Anti_Tg": {"threshold": 115},
-            "TSH_receptor_Ab": {"threshold": 1.75}
-        }
+        Args:
+            lab_data: 檢驗數據字典，或欄位順序同 _TEST_NAMES 的 (N, K) 陣列（缺值以 nan 表示）
+            
+        Returns:
+            字典輸入返回 {檢驗項目: 狀態}；陣列輸入返回同形狀的狀態陣列，缺值為空字串
+        """
+        if isinstance(lab_data, np.ndarray):
+            values = lab_data.astype(np.float64, copy=False)
+            return np.where(np.isnan(values), "", _classify_lab_values(values))
         
+        status = {}
         for test, value in lab_data.items():
-            if test in reference_ranges:
-                ref = reference_ranges[test]
-                
-                if "low" in ref and "high" in ref:
-                    if value < ref["low"]:
-                        status[test] = "低"
-                    elif value > ref["high"]:
-                        status[test] = "高"
-                    else:
-                        status[test] = "正常"
-                elif "threshold" in ref:
-                    status[test] = "陽性" if value > ref["threshold"] else "陰性"
+            if test in _LOW:
+                if value < _LOW[test]:
+                    status[test] = "低"
+                elif value > _HIGH[test]:
+                    status[test] = "高"
+                else:
+                    status[test] = "正常"
+            elif test in _THRESHOLD:
+                status[test] = "陽性" if value > _THRESHOLD[test] else "陰性"
         
         return status
     
@@ -144,17 +237,21 @@ class LiteratureBasedAnalyzer:
         ft4_status = lab_status.get("Free_T4", "未知")
         ft3_status = lab_status.get("Free_T3", "未知")
         
-        # 尋找最匹配的模式
-        for pattern in self.patterns:
-            if (pattern.get("tsh_status") == tsh_status and 
-                pattern.get("ft4_status") == ft4_status):
-                
-                # 如果有 T3 數據，也要匹配
-                if ft3_status != "未知" and pattern.get("ft3_status"):
-                    if pattern.get("ft3_status") == ft3_status:
-                        return pattern
-                else:
-                    return pattern
+        # 沒有 T3 數據時只需比對 TSH 與 Free T4
+        if ft3_status == "未知":
+            pattern = self._pair_index.get((tsh_status, ft4_status))
+            if pattern is not None:
+                return pattern
+        else:
+            # 有 T3 數據時，接受 T3 相符或未指定 T3 的模式
+            candidates = [
+                hit for hit in (
+                    self._pattern_index.get((tsh_status, ft4_status, ft3_status)),
+                    self._pattern_index.get((tsh_status, ft4_status, None))
+                ) if hit is not None
+            ]
+            if candidates:
+                return min(candidates, key=lambda hit: hit[0])[1]
         
         # 如果沒有完全匹配，返回最接近的模式
         return self._find_closest_pattern(lab_status)
@@ -164,9 +261,9 @@ class LiteratureBasedAnalyzer:
         # 如果沒有完全匹配，根據 TSH 狀態返回相關模式
         tsh_status = lab_status.get("TSH", "未知")
         
-        for pattern in self.patterns:
-            if pattern.get("tsh_status") == tsh_status:
-                return pattern
+        pattern = self._tsh_index.get(tsh_status)
+        if pattern is not None:
+            return pattern
         
         # 返回預設模式
         return {
@@ -193,9 +290,10 @@ class LiteratureBasedAnalyzer:
         # 根據患者資訊檢查特定干擾因素
         if patient_info:
             # 檢查 Biotin 干擾
-            if patient_info.get("medications"):
-                meds = patient_info["medications"].lower()
-                if "biotin" in meds or "生物素" in meds:
+            meds = patient_info.get("medications")
+            if meds:
+                meds = meds.lower()
+                if any(token in meds for token in _BIOTIN_TOKENS):
                     factors.append("Biotin 可能干擾檢測結果")
             
             # 檢查懷孕
@@ -211,28 +309,30 @@ class LiteratureBasedAnalyzer:
             if patient_info.get("bmi", 0) > 30:
                 factors.append("肥胖可能導致 TSH 偏高")
         
-        return list(set(factors))  # 去重
+        return list(dict.fromkeys(factors))  # 去重並保留原有順序
     
     def _generate_differential_from_literature(
         self,
         matched_pattern: Dict[str, Any],
         lab_status: Dict[str, str],
         symptoms: List[str],
-        patient_info: Dict[str, Any]
+        patient_info: Dict[str, Any],
+        top_k: int = 8
     ) -> List[Tuple[str, float]]:
-        """基於文獻生成鑑別診斷"""
+        """基於文獻生成鑑別診斷，依相關性返回前 top_k 項"""
         differential = []
         
         # 從匹配模式中獲取常見原因
-        common_causes = matched_pattern.get("common_causes", [])
-        for i, cause in enumerate(common_causes):
+        cause_boosts = matched_pattern.get("_cause_boosts")
+        if cause_boosts is None:
+            cause_boosts = self._build_cause_boosts(matched_pattern.get("common_causes", []))
+        
+        for i, (cause, boost_keys) in enumerate(cause_boosts):
             # 根據順序給予不同權重
             base_score = 0.8 - (i * 0.1)
             
             # 根據抗體結果調整分數
-            if "Graves" in cause and lab_status.get("TSH_receptor_Ab") == "陽性":
-                score = min(base_score + 0.2, 0.95)
-            elif "橋本" in cause and lab_status.get("Anti_TPO") == "陽性":
+            if any(lab_status.get(key) == "陽性" for key in boost_keys):
                 score = min(base_score + 0.2, 0.95)
             else:
                 score = base_score
@@ -240,12 +340,15 @@ class LiteratureBasedAnalyzer:
             differential.append((cause, score))
         
         # 從鑑別診斷列表中添加
+        seen = {cause for cause, _ in differential}
         diff_list = matched_pattern.get("differential_diagnosis", [])
         for diagnosis in diff_list:
-            if diagnosis not in [d[0] for d in differential]:
+            if diagnosis not in seen:
+                seen.add(diagnosis)
                 differential.append((diagnosis, 0.3))
         
-        return sorted(differential, key=lambda x: x[1], reverse=True)
+        # 等同 sorted(..., reverse=True)[:top_k]，同分者維持原順序
+        return heapq.nlargest(top_k, differential, key=lambda x: x[1])
     
     def _extract_recommendations(
         self,
@@ -275,7 +378,7 @@ class LiteratureBasedAnalyzer:
         if tsh_status == "低" and ft4_status == "低":
             recommendations.append("高度懷疑中樞性甲狀腺功能異常，建議評估其他垂體激素")
         
-        return list(set(recommendations))  # 去重
+        return list(dict.fromkeys(recommendations))  # 去重並保留原有順序
     
     def _extract_additional_tests(
         self,
@@ -299,7 +402,7 @@ class LiteratureBasedAnalyzer:
         if "Free_T3" not in lab_data:
             tests.append("Free T3")
         
-        return list(set(tests))  # 去重
+        return list(dict.fromkeys(tests))  # 去重並保留原有順序
     
     def _calculate_confidence(
         self,
@@ -349,19 +452,19 @@ class LiteratureBasedAnalyzer:
     ) -> Optional[str]:
         """查找相關的問答內容"""
         relevant_qa = []
+        query_mask = sum(bit for _, test, bit in _QA_TOPICS if lab_status.get(test))
+        if not query_mask:
+            return None
         
         for qa in self.qa_pairs:
-            question = qa.get("question", "").lower()
-            answer = qa.get("answer", "")
-            
             # 根據檢驗狀態查找相關問答
-            if ("tsh" in question and lab_status.get("TSH")) or \
-               ("t4" in question and lab_status.get("Free_T4")) or \
-               ("t3" in question and lab_status.get("Free_T3")):
-                relevant_qa.append(f"Q: {qa['question']}\nA: {answer}")
+            if qa["_topic_mask"] & query_mask:
+                relevant_qa.append(f"Q: {qa['question']}\nA: {qa.get('answer', '')}")
+                if len(relevant_qa) == _MAX_RELEVANT_QA:
+                    break
         
         if relevant_qa:
-            return "\n\n".join(relevant_qa[:2])  # 最多返回2個相關問答
+            return "\n\n".join(relevant_qa)
         
         return None
     
@@ -371,65 +474,63 @@ class LiteratureBasedAnalyzer:
         lab_data: Dict[str, float]
     ) -> str:
         """生成基於文獻的診斷報告"""
-        report = f"""
+        parts = ["""
 # 基於文獻的甲狀腺功能檢查報告
 
 ## 檢驗結果
-"""
+"""]
         # 檢驗數值
-        lab_status = self._determine_lab_status(lab_data)
-        for test, value in lab_data.items():
-            status = lab_status.get(test, "")
-            report += f"- **{test}**: {value} ({status})\n"
+        lab_status = diagnosis.lab_status or self._determine_lab_status(lab_data)
+        parts.extend(
+            f"- **{test}**: {value} ({lab_status.get(test, '')})\n"
+            for test, value in lab_data.items()
+        )
         
-        report += f"""
+        parts.append(f"""
 ## 模式匹配
 **檢驗模式**: {diagnosis.pattern_match}
 
 ## 常見原因
-"""
-        for cause in diagnosis.common_causes:
-            report += f"- {cause}\n"
+""")
+        parts.extend(f"- {cause}\n" for cause in diagnosis.common_causes)
         
-        report += """
+        parts.append("""
 ## 鑑別診斷
-"""
-        for diag, score in diagnosis.differential_diagnosis:
-            report += f"- {diag} (相關性: {score:.0%})\n"
+""")
+        parts.extend(
+            f"- {diag} (相關性: {score:.0%})\n"
+            for diag, score in diagnosis.differential_diagnosis
+        )
         
         if diagnosis.interfering_factors:
-            report += """
+            parts.append("""
 ## 潛在干擾因素
-"""
-            for factor in diagnosis.interfering_factors:
-                report += f"- {factor}\n"
+""")
+            parts.extend(f"- {factor}\n" for factor in diagnosis.interfering_factors)
         
-        report += """
+        parts.append("""
 ## 建議事項
-"""
-        for rec in diagnosis.recommendations:
-            report += f"- {rec}\n"
+""")
+        parts.extend(f"- {rec}\n" for rec in diagnosis.recommendations)
         
         if diagnosis.additional_tests:
-            report += """
+            parts.append("""
 ## 建議額外檢查
-"""
-            for test in diagnosis.additional_tests:
-                report += f"- {test}\n"
+""")
+            parts.extend(f"- {test}\n" for test in diagnosis.additional_tests)
         
-        report += f"""
+        parts.append(f"""
 ## 診斷信心度
 {diagnosis.confidence_score:.0%}
 
 ## 參考文獻
-"""
-        for lit in diagnosis.supporting_literature:
-            report += f"- {lit}\n"
+""")
+        parts.extend(f"- {lit}\n" for lit in diagnosis.supporting_literature)
         
         if diagnosis.special_notes:
-            report += f"""
+            parts.append(f"""
 ## 相關問答參考
 {diagnosis.special_notes}
-"""
+""")
         
-        return report 
\ No newline at end of file
+        return "".join(parts) 
\ No newline at end of file
@@ -3,41 +3,329 @@ RAG (Retrieval-Augmented Generation) 引擎
 整合文獻解析和向量檢索
 """
 import os
-from typing import List, Dict, Any
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.llms import OpenAI
+import copy
+import time
+import pickle
+import asyncio
+import hashlib
+import threading
+import fcntl
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import faiss
+import pdfplumber
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+# 以模組名稱引用 OpenAI 用戶端，避免與 LangChain 同名的 OpenAI 類別互相遮蔽
+import openai
+# 只匯入輕量的 LangChain 基礎型別；嵌入模型與載入器在首次使用時才匯入
+# （langchain.embeddings 等套件的 __init__ 會連帶載入所有整合模組）
 from langchain.schema import Document
+from langchain.schema.embeddings import Embeddings
 from config import Config
-from src.document_parser import MarkdownDocumentParser
+from src.document_parser import MarkdownDocumentParser, PARSER_VERSION
 from src.literature_based_analyzer import LiteratureBasedAnalyzer
+from src.embedding_cache import EmbeddingCache, CachedEmbeddings
+from src.text_splitter import SeparatorTextSplitter
+
+# 文件快取版本：建立文件、分割方式或快取內容格式改變時遞增，使舊的快取失效
+_DOCUMENT_CACHE_VERSION = 3
+
+def _write_atomic(path: str, data: bytes):
+    """先寫入暫存檔再取代，其他行程不會讀到寫到一半的檔案"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# 甲狀腺診斷指南文件（內容固定，模組載入時建立一次）
+# 分割器會建立新的 Document 並複製 metadata，這些物件不會被修改
+_GUIDELINE_DOCS: Tuple[Document, ...] = (
+    Document(
+        page_content="甲狀腺功能異常的診斷與鑑別\n\n1. 甲狀腺功能亢進 (Hyperthyroidism)\n診斷標準：\n- TSH < 0.4 μIU/mL (降低)\n- Free T4 > 1.8 ng/dL 和/或 Free T3 > 4.2 pg/mL (升高)\n\n常見原因：\n- Graves' disease（瀰漫性毒性甲狀腺腫）",
+        metadata={"type": "clinical_guideline", "condition": "hyperthyroidism"}
+    ),
+)
+
+class FAISSVectorStore:
+    """
+    以 FAISS 純量量化索引實作的向量資料庫
+    
+    向量正規化後內積即為餘弦相似度；索引以 int8/fp16 儲存，搜尋時由 FAISS 即時還原
+    
+    多個 worker 行程共用同一份磁碟索引：寫入須在 transaction() 內進行（檔案鎖 + 先重新載入
+    其他行程的更新再加入並 persist）；搜尋前若磁碟上的索引已被其他行程更新，會先重新載入
+    """
+    
+    def __init__(self, persist_directory: str, embedding_function: Embeddings):
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.index_path = os.path.join(persist_directory, "faiss.index")
+        self.docs_path = os.path.join(persist_directory, "docs.pkl")
+        self.lock_path = os.path.join(persist_directory, ".lock")
+        self.index = None
+        self.documents: List[Document] = []
+        # 已加入文件的 id（存於 metadata，隨 documents 一起持久化）
+        self.ids = set()
+        self._lock = threading.Lock()
+        # 目前載入的磁碟索引版本（檔案 inode 與修改時間）
+        self._loaded_version = None
+        
+        os.makedirs(persist_directory, exist_ok=True)
+        self.refresh()
+    
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """跨行程的檔案鎖；每次開啟新的檔案描述元，同一行程的不同執行緒之間也會互斥"""
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    @contextmanager
+    def transaction(self):
+        """
+        取得寫入鎖並載入其他行程的最新內容
+        
+        區塊內的 add_documents / add_embeddings 須接著 persist()，未寫入的內容會在下次重新載入時遺失
+        """
+        with self._file_lock(exclusive=True):
+            self._reload_if_changed()
+            yield
+    
+    def refresh(self):
+        """磁碟上的索引由其他行程更新時重新載入"""
+        if self._disk_version() != self._loaded_version:
+            with self._file_lock(exclusive=False):
+                self._reload_if_changed()
+    
+    def _disk_version(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+    
+    def _reload_if_changed(self):
+        """在持有檔案鎖時呼叫：載入磁碟上較新的索引與文件"""
+        version = self._disk_version()
+        if version is None or version == self._loaded_version:
+            return
+        
+        index = faiss.read_index(self.index_path)
+        with open(self.docs_path, "rb") as f:
+            documents = pickle.load(f)
+        with self._lock:
+            self.index = index
+            self.documents = documents
+            self.ids = {doc.metadata["id"] for doc in documents if "id" in doc.metadata}
+            self._loaded_version = version
+    
+    def add_documents(self, documents: List[Document]):
+        """嵌入並加入文件"""
+        if not documents:
+            return
+        
+        self.add_embeddings(
+            documents,
+            self.embedding_function.embed_documents([doc.page_content for doc in documents])
+        )
+    
+    def add_embeddings(
+        self,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        ids: Optional[List[str]] = None
+    ):
+        """加入已計算好嵌入向量的文件；提供 ids 時記錄於 metadata"""
+        if not documents:
+            return
+        
+        if ids is not None:
+            # 其他行程可能已加入相同內容的文件
+            kept = [i for i, doc_id in enumerate(ids) if doc_id not in self.ids]
+            if not kept:
+                return
+            documents = [documents[i] for i in kept]
+            embeddings = [embeddings[i] for i in kept]
+            ids = [ids[i] for i in kept]
+            for doc, doc_id in zip(documents, ids):
+                doc.metadata["id"] = doc_id
+        
+        vectors = self._normalize(embeddings)
+        with self._lock:
+            if self.index is None:
+                self.index = self._create_index(vectors)
+            self.index.add(vectors)
+            self.documents.extend(documents)
+            if ids is not None:
+                self.ids.update(ids)
+    
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """檢索與查詢最相似的文件"""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+    
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """檢索與查詢最相似的文件及其餘弦相似度（介面同 LangChain VectorStore）"""
+        self.refresh()
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        
+        query_vector = self._normalize([self.embedding_function.embed_query(query)])
+        with self._lock:
+            scores, indices = self.index.search(query_vector, min(k, self.index.ntotal))
+            return [
+                (self.documents[i], float(score))
+                for i, score in zip(indices[0], scores[0]) if i != -1
+            ]
+    
+    def persist(self):
+        """將索引與文件內容寫入磁碟（多行程時須於 transaction() 內呼叫）"""
+        if self.index is None:
+            return
+        
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with self._lock:
+            # 先寫文件再寫索引；索引檔的版本代表整份資料的版本
+            _write_atomic(self.docs_path, pickle.dumps(self.documents))
+            _write_atomic(self.index_path, faiss.serialize_index(self.index).tobytes())
+            self._loaded_version = self._disk_version()
+    
+    @staticmethod
+    def _create_index(vectors: np.ndarray):
+        """
+        建立純量量化索引
+        
+        預設 QT_fp16 不需訓練；若改用 QT_8bit，各維度範圍只由首批向量訓練，之後上傳的文件會被截斷至該範圍
+        """
+        index = faiss.IndexScalarQuantizer(
+            vectors.shape[1],
+            getattr(faiss.ScalarQuantizer, Config.FAISS_QUANTIZER),
+            faiss.METRIC_INNER_PRODUCT
+        )
+        if not index.is_trained:
+            index.train(vectors)
+        return index
+    
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        """轉為連續 float32 陣列並做 L2 正規化"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+class ConcurrentOpenAIEmbeddings(Embeddings):
+    """
+    以 AsyncOpenAI 同時送出多個嵌入批次
+    
+    每批 batch_size 筆文字，最多 max_concurrency 個請求同時進行；429 等錯誤由 OpenAI 用戶端以指數退避重試。
+    查詢與單批即可容納的輸入改用常駐的同步用戶端，沿用既有連線，不另建事件迴圈
+    """
+    
+    def __init__(self, api_key: str, model: str, batch_size: int, max_concurrency: int, max_retries: int):
+        self.api_key = api_key
+        self.model = model
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.client = openai.OpenAI(api_key=api_key, max_retries=max_retries)
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # 非同步用戶端綁定於當前事件迴圈，每次批次嵌入各自建立
+        async with openai.AsyncOpenAI(api_key=self.api_key, max_retries=self.max_retries) as client:
+            async def embed_batch(batch: List[str]) -> List[List[float]]:
+                async with semaphore:
+                    response = await client.embeddings.create(model=self.model, input=batch)
+                return self._ordered_vectors(response)
+            
+            results = await asyncio.gather(*(
+                embed_batch(texts[start:start + self.batch_size])
+                for start in range(0, len(texts), self.batch_size)
+            ))
+        
+        return [vector for batch in results for vector in batch]
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        
+        # 單批即可容納時直接以常駐用戶端送出
+        if len(texts) <= self.batch_size:
+            return self._ordered_vectors(self.client.embeddings.create(model=self.model, input=texts))
+        return asyncio.run(self.aembed_documents(texts))
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+    
+    @staticmethod
+    def _ordered_vectors(response: Any) -> List[List[float]]:
+        """依回應中的 index 排列嵌入向量"""
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
 
 class RAGEngine:
     def __init__(self):
         """初始化 RAG 引擎"""
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=Config.OPENAI_API_KEY,
-            model=Config.EMBEDDING_MODEL
+        if Config.USE_OPENAI_EMBED:
+            provider, model_name = "openai", Config.OPENAI_EMBEDDING_MODEL
+            base_embeddings = ConcurrentOpenAIEmbeddings(
+                api_key=Config.OPENAI_API_KEY,
+                model=model_name,
+                batch_size=Config.EMBEDDING_BATCH_SIZE,
+                max_concurrency=Config.EMBEDDING_MAX_CONCURRENCY,
+                max_retries=Config.EMBEDDING_MAX_RETRIES
+            )
+        else:
+            # 本地模型只在此載入一次
+            from langchain.embeddings import HuggingFaceEmbeddings
+            provider, model_name = "sentence-transformers", Config.EMBEDDING_MODEL
+            base_embeddings = HuggingFaceEmbeddings(
+                model_name=model_name,
+                model_kwargs={"device": "cpu"},
+                encode_kwargs={"batch_size": 32}
+            )
+        
+        self.embedding_cache = EmbeddingCache(
+            Config.EMBEDDING_CACHE_PATH,
+            provider=provider,
+            model=model_name,
+            ttl=Config.EMBEDDING_CACHE_TTL
         )
+        self.embeddings = CachedEmbeddings(base_embeddings, self.embedding_cache)
+        self.llm_client = openai.AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
+        self.sync_llm_client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        
+        # 相同查詢的合併與結果快取：key -> 進行中的 Task / (時間戳, 結果)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._answer_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._llm_semaphore: Optional[asyncio.Semaphore] = None
         self.vector_store = None
+        self._splitter = SeparatorTextSplitter(
+            chunk_size=Config.CHUNK_SIZE,
+            chunk_overlap=Config.CHUNK_OVERLAP,
+            separators=["\n\n", "\n", "。", "，", " ", ""]
+        )
         self.document_parser = MarkdownDocumentParser()
         self.literature_analyzer = LiteratureBasedAnalyzer()
         self._initialize_vector_store()
     
     def _initialize_vector_store(self):
         """初始化向量資料庫"""
-        if os.path.exists(Config.VECTOR_DB_PATH):
-            self.vector_store = Chroma(
-                persist_directory=Config.VECTOR_DB_PATH,
-                embedding_function=self.embeddings
-            )
-        else:
-            self.vector_store = Chroma(
-                persist_directory=Config.VECTOR_DB_PATH,
-                embedding_function=self.embeddings
-            )
-            self._load_initial_documents()
+        self.vector_store = FAISSVectorStore(
+            persist_directory=Config.VECTOR_DB_PATH,
+            embedding_function=self.embeddings
+        )
+        
+        # 尚未建立索引時載入初始文件；多個 worker 同時啟動時只有取得寫入鎖的第一個會建立
+        with self.vector_store.transaction():
+            if self.vector_store.index is None:
+                self._load_initial_documents()
     
     def _load_initial_documents(self):
         """載入初始醫學文件"""
@@ -47,76 +335,294 @@ class RAGEngine:
             "./data/documents/Thyroid function.md"
         ]
         
+        kb_path = "./data/thyroid_knowledge_base.json"
+        
         for doc_path in doc_paths:
             if os.path.exists(doc_path):
-                # 解析文檔
-                parsed_data = self.document_parser.parse_markdown_document(doc_path)
+                # 快取鍵包含原始檔內容雜湊、解析器與文件快取版本及分割設定，任一改變即重新解析
+                with open(doc_path, "rb") as f:
+                    src_hash = hashlib.sha256(f.read()).hexdigest()
+                cache_path = os.path.join(
+                    Config.SPLIT_CACHE_DIR,
+                    f"{src_hash}_p{PARSER_VERSION}_d{_DOCUMENT_CACHE_VERSION}"
+                    f"_{Config.CHUNK_SIZE}_{Config.CHUNK_OVERLAP}_{Config.MIN_CHUNK_SIZE}.pkl"
+                )
+                
+                # 知識庫與分割後的文件存於同一個快取項目，兩者必定來自同一次解析
+                if os.path.exists(cache_path):
+                    with open(cache_path, "rb") as f:
+                        cached = pickle.load(f)
+                    knowledge, split_documents = cached["knowledge"], cached["documents"]
+                else:
+                    # 解析文檔
+                    parsed_data = self.document_parser.parse_markdown_document(doc_path)
+                    knowledge = self.document_parser.dump_parsed_knowledge(parsed_data)
+                    
+                    # 創建文檔用於向量檢索並分割
+                    documents = self._create_documents_from_parsed_data(parsed_data)
+                    split_documents = self._split_documents(documents)
+                    
+                    os.makedirs(Config.SPLIT_CACHE_DIR, exist_ok=True)
+                    _write_atomic(cache_path, pickle.dumps({
+                        "knowledge": knowledge,
+                        "documents": split_documents
+                    }))
                 
                 # 保存解析後的知識庫
-                kb_path = "./data/thyroid_knowledge_base.json"
                 os.makedirs("./data", exist_ok=True)
-                self.document_parser.save_parsed_knowledge(parsed_data, kb_path)
+                _write_atomic(kb_path, knowledge)
                 
                 # 載入到文獻分析器
                 self.literature_analyzer.load_knowledge_base(kb_path)
                 
-                # 創建文檔用於向量檢索
-                documents = self._create_documents_from_parsed_data(parsed_data)
-                
-                # 分割文件
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=Config.CHUNK_SIZE,
-                    chunk_overlap=Config.CHUNK_OVERLAP,
-                    separators=["\n\n", "\n", "。", "，", " ", ""]
-                )
-                
-                split_documents = text_splitter.split_documents(documents)
-                
                 # 加入向量資料庫
-                self.vector_store.add_documents(split_documents)
+                self._add_documents_in_batches(split_documents)
                 self.vector_store.persist()
                 
-                print(f"成功載入文檔: {doc_path}")
+                stats = self.embedding_cache.stats()
+                print(f"成功載入文檔: {doc_path}（嵌入快取命中 {stats['hits']}，未命中 {stats['misses']}）")
                 break
     
-    def _create_documents_from_parsed_data(self, parsed_data: Dict[str, Any]) -> List[Document]:
-        """從解析的數據創建文檔"""
+    def _split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        分割文件，並將過短的片段併入同一份文件的前一片段
+        
+        只在同一份原始文件的片段之間合併，不同文件（及其 metadata）各自保留；
+        合併時只接上與前一片段不重疊的部分，已完全包含於前一片段的片段直接略過
+        分割結果不會超過 CHUNK_SIZE；合併後上限為 CHUNK_SIZE 的 1.1 倍
+        """
+        max_merged = Config.CHUNK_SIZE * 1.1
+        merged: List[Document] = []
+        
+        for document in documents:
+            prev = None
+            prev_end = 0  # 前一片段在原文中的終點
+            for offset, chunk in self._splitter.split_text_with_offsets(document.page_content):
+                end = offset + len(chunk)
+                if prev is not None and len(chunk) < Config.MIN_CHUNK_SIZE:
+                    # 與前一片段重疊的部分不重複加入
+                    tail = chunk[prev_end - offset:] if offset < prev_end else "\n" + chunk
+                    if len(prev.page_content) + len(tail) < max_merged:
+                        prev.page_content += tail
+                        prev_end = max(prev_end, end)
+                        continue
+                
+                prev = Document(page_content=chunk, metadata=copy.deepcopy(document.metadata))
+                prev_end = end
+                merged.append(prev)
+        
+        return merged
+    
+    def _add_documents_in_batches(self, documents: List[Document]):
+        """
+        以內容雜湊為 id，嵌入後一次加入向量資料庫
+        
+        id 已存在的片段不再重新嵌入
+        """
+        pending = {}
+        for doc in documents:
+            doc_id = hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+            if doc_id not in self.vector_store.ids:
+                pending.setdefault(doc_id, doc)
+        
+        # 嵌入模型自行分批：OpenAI 各批次同時送出，本地模型依 encode_kwargs 的 batch_size
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in pending.values()])
+        
+        # 所有向量以一次呼叫加入索引
+        self.vector_store.add_embeddings(list(pending.values()), vectors, ids=list(pending))
+    
+    def add_document(self, file_path: str, doc_type: str = "txt") -> str:
+        """
+        將上傳的文件加入知識庫
+        
+        Args:
+            file_path: 文件路徑
+            doc_type: 文件類型（pdf 或 txt）
+            
+        Returns:
+            處理結果訊息
+        """
+        if doc_type == "pdf":
+            documents = self._load_pdf(file_path)
+        else:
+            from langchain.document_loaders import TextLoader
+            documents = TextLoader(file_path, encoding="utf-8").load()
+        
+        split_documents = self._split_documents(documents)
+        
+        # 所有片段一次加入：未命中快取的文字以 EMBEDDING_BATCH_SIZE 為單位批次嵌入
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in split_documents])
+        
+        # 嵌入在鎖外完成；加入與寫入在鎖內進行，不會覆蓋其他 worker 上傳的文件
+        with self.vector_store.transaction():
+            self.vector_store.add_embeddings(split_documents, vectors)
+            self.vector_store.persist()
+        
+        return f"成功加入 {len(split_documents)} 個文件片段: {os.path.basename(file_path)}"
+    
+    def _load_pdf(self, file_path: str) -> List[Document]:
+        """
+        逐頁擷取 PDF 文字
+        
+        敘述性頁面使用速度較快的 pypdfium2；繪圖路徑物件多（通常為表格）的頁面改用 pdfplumber
+        """
         documents = []
+        pdf = pdfium.PdfDocument(file_path)
+        table_pdf = None
+        
+        try:
+            for page_number, page in enumerate(pdf):
+                path_count = sum(1 for _ in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_PATH,)))
+                if path_count > Config.PDF_TABLE_PATH_THRESHOLD:
+                    if table_pdf is None:
+                        table_pdf = pdfplumber.open(file_path)
+                    text = table_pdf.pages[page_number].extract_text() or ""
+                else:
+                    text = page.get_textpage().get_text_range()
+                
+                documents.append(Document(
+                    page_content=text,
+                    metadata={"source": file_path, "page": page_number}
+                ))
+        finally:
+            pdf.close()
+            if table_pdf is not None:
+                table_pdf.close()
+        
+        return documents
+    
+    def query(self, question: str, lab_data: Dict[str, float] = None) -> Dict[str, Any]:
+        """
+        查詢知識庫並生成診斷建議（同步版本，供 Streamlit 使用）
+        
+        Args:
+            question: 查詢問題
+            lab_data: 檢驗數據
+            
+        Returns:
+            {"diagnosis": LLM 回覆, "sources": 引用的文獻片段}
+        """
+        documents = self.vector_store.similarity_search(question, k=Config.RETRIEVAL_TOP_K)
+        response = self.sync_llm_client.chat.completions.create(
+            model=Config.LLM_MODEL,
+            messages=self._build_messages(question, lab_data, documents)
+        )
+        return self._format_response(response, documents)
+    
+    async def aquery(self, question: str, lab_data: Dict[str, float] = None) -> Dict[str, Any]:
+        """
+        以非同步方式查詢知識庫並生成診斷建議，參數與回傳同 query
+        
+        快取有效期內的相同查詢直接回傳；同時進行中的相同查詢只呼叫一次 LLM
+        """
+        key = hashlib.sha256(
+            (question + str(sorted((lab_data or {}).items()))).encode("utf-8")
+        ).hexdigest()
+        
+        cached = self._answer_cache.get(key)
+        if cached and time.monotonic() - cached[0] < Config.ANSWER_CACHE_TTL:
+            return cached[1]
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate_answer(key, question, lab_data))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # shield：單一請求取消時不影響其他等待相同結果的請求
+        return await asyncio.shield(task)
+    
+    async def _generate_answer(
+        self,
+        key: str,
+        question: str,
+        lab_data: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """實際執行檢索與 LLM 呼叫，並寫入結果快取"""
+        # 向量檢索為同步呼叫，移至執行緒執行
+        documents = await asyncio.to_thread(
+            self.vector_store.similarity_search, question, k=Config.RETRIEVAL_TOP_K
+        )
+        
+        # 限制同時進行的 LLM 請求數量，避免超過 API 速率限制
+        if self._llm_semaphore is None:
+            self._llm_semaphore = asyncio.Semaphore(Config.LLM_MAX_CONCURRENCY)
+        async with self._llm_semaphore:
+            response = await self.llm_client.chat.completions.create(
+                model=Config.LLM_MODEL,
+                messages=self._build_messages(question, lab_data, documents)
+            )
+        result = self._format_response(response, documents)
+        
+        self._answer_cache.pop(key, None)
+        self._answer_cache[key] = (time.monotonic(), result)
+        if len(self._answer_cache) > Config.ANSWER_CACHE_SIZE:
+            self._answer_cache.pop(next(iter(self._answer_cache)))
+        
+        return result
+    
+    def _build_messages(
+        self,
+        question: str,
+        lab_data: Dict[str, float],
+        documents: List[Document]
+    ) -> List[Dict[str, str]]:
+        """組合送給 LLM 的對話內容"""
+        context = "\n\n".join(doc.page_content for doc in documents)
+        lab_text = "\n".join(f"- {test}: {value}" for test, value in (lab_data or {}).items())
+        
+        return [
+            {
+                "role": "system",
+                "content": "你是甲狀腺專科醫師，請完全依據提供的文獻內容回答，不要引用文獻以外的知識。"
+            },
+            {
+                "role": "user",
+                "content": f"文獻內容：\n{context}\n\n檢驗數據：\n{lab_text}\n\n問題：{question}"
+            }
+        ]
+    
+    def _format_response(self, response: Any, documents: List[Document]) -> Dict[str, Any]:
+        """整理 LLM 回覆與引用來源"""
+        return {
+            "diagnosis": response.choices[0].message.content,
+            "sources": [doc.page_content for doc in documents]
+        }
+    
+    def _create_documents_from_parsed_data(self, parsed_data: Dict[str, Any]) -> List[Document]:
+        """
+        從解析的數據創建文檔
+        
+        以固定的診斷指南文件開頭；其後內容相同的文檔只保留第一份，
+        其餘的 metadata 併入其 duplicates 列表，避免重複嵌入
+        """
+        documents = list(_GUIDELINE_DOCS)
+        seen: Dict[bytes, Document] = {}
+        
+        def add(content: str, metadata: Dict[str, Any]):
+            key = hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+            first = seen.get(key)
+            if first is None:
+                seen[key] = doc = Document(page_content=content, metadata=metadata)
+                documents.append(doc)
+            else:
+                first.metadata.setdefault("duplicates", []).append(metadata)
         
         # 為每個模式創建詳細文檔
         for pattern in parsed_data.get("patterns", []):
             # 主要模式文檔
-            content = f"模式: {pattern['tsh_status']}, {pattern['ft4_status']}"
-            documents.append(Document(
-                page_content=content,
-                metadata={"pattern": pattern}
-            ))
+            add(f"模式: {pattern.tsh_status}, {pattern.ft4_status}", {"pattern": pattern})
         
         # 解析臨床指南
-        guidelines = parsed_data["guidelines"]
-        for guideline in guidelines:
-            documents.append(Document(
-                page_content=f"指南: {guideline['condition']}",
-                metadata={"guideline": guideline}
-            ))
+        for guideline in parsed_data.get("guidelines", []):
+            add(f"指南: {guideline['condition']}", {"guideline": guideline})
         
         # 解析問答對
-        qa_pairs = parsed_data["qa_pairs"]
-        for qa in qa_pairs:
-            documents.append(Document(
-                page_content=f"Q: {qa['question']}\nA: {qa['answer']}",
-                metadata={"qa_pair": qa}
-            ))
+        for qa in parsed_data.get("qa_pairs", []):
+            add(f"Q: {qa['question']}\nA: {qa['answer']}", {"qa_pair": qa})
         
         return documents
     
     def _create_thyroid_guidelines(self) -> List[Document]:
         """創建甲狀腺診斷指南文件"""
-        guidelines = [
-            Document(
-                page_content="甲狀腺功能異常的診斷與鑑別\n\n1. 甲狀腺功能亢進 (Hyperthyroidism)\n診斷標準：\n- TSH < 0.4 μIU/mL (降低)\n- Free T4 > 1.8 ng/dL 和/或 Free T3 > 4.2 pg/mL (升高)\n\n常見原因：\n- Graves' disease（瀰漫性毒性甲狀腺腫）",
-                metadata={"type": "clinical_guideline", "condition": "hyperthyroidism"}
-            )
-        ]
-        return guidelines
- 
\ No newline at end of file
+        return list(_GUIDELINE_DOCS)
@@ -0,0 +1,116 @@
+"""
+單次掃描的文字分割器
+以一個正規表示式找出所有分隔符位置，再依分隔符優先順序貪婪組合片段
+"""
+import copy
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+import regex as re
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+
+class SeparatorTextSplitter:
+    """
+    依分隔符優先順序分割文字（介面同 LangChain TextSplitter 的 split_text / split_documents）
+
+    每個片段至多 chunk_size 字元，切點必須超過前一片段的終點。切點優先取片段後半
+    （至少填滿 chunk_size 的一半）中優先順序最高的分隔符最後一次出現處；後半沒有分隔符時
+    才退而接受前半的分隔符，完全沒有時以 chunk_size 截斷。下一片段自切點前 chunk_overlap
+    字元內的第一個分隔符處開始，與前一片段重疊
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, separators: Sequence[str]):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) 必須小於 chunk_size ({chunk_size})")
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        # 空字串代表逐字截斷，即沒有分隔符時的預設行為，不需列入比對
+        self.separators = [sep for sep in separators if sep]
+        # 每個分隔符各自成為一個群組，以 lastindex 得知命中的優先順序
+        self._separator_re = (
+            re.compile("|".join(f"({re.escape(sep)})" for sep in self.separators))
+            if self.separators else None
+        )
+
+    def split_text(self, text: str) -> List[str]:
+        """分割單一文字，去除片段前後空白並略過空白片段"""
+        return [chunk for _, chunk in self.split_text_with_offsets(text)]
+
+    def split_text_with_offsets(self, text: str) -> List[Tuple[int, str]]:
+        """分割單一文字，返回 (片段在原文中的起點, 去除前後空白的片段)"""
+        chunks = []
+        for start, end in self._split_spans(text):
+            raw = text[start:end]
+            chunk = raw.lstrip()
+            offset = start + len(raw) - len(chunk)
+            chunk = chunk.rstrip()
+            if chunk:
+                chunks.append((offset, chunk))
+        return chunks
+
+    def _split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """計算各片段的 (起點, 終點) 位置；終點嚴格遞增，片段不會落在前一片段之內"""
+        # 一次掃描：各優先順序的切點（分隔符結尾位置）與所有切點
+        ends_by_priority: List[List[int]] = [[] for _ in self.separators]
+        all_ends: List[int] = []
+        for match in self._separator_re.finditer(text) if self._separator_re else ():
+            ends_by_priority[match.lastindex - 1].append(match.end())
+            all_ends.append(match.end())
+
+        spans = []
+        start = 0
+        prev_end = 0
+        length = len(text)
+        half = self.chunk_size // 2
+
+        while start < length:
+            limit = start + self.chunk_size
+            if limit >= length:
+                end = length
+                at_separator = True
+            else:
+                end = self._last_cut(ends_by_priority, max(prev_end, start + half), limit)
+                if end is None:
+                    end = self._last_cut(ends_by_priority, prev_end, limit)
+                at_separator = end is not None
+                if end is None:
+                    end = limit
+
+            spans.append((start, end))
+            if end >= length:
+                break
+
+            # 重疊部分從分隔符處開始；截斷處沒有分隔符可用時按字元重疊
+            # 起點須在本片段起點之後，確保每輪都有進展
+            overlap_start = end - self.chunk_overlap
+            i = bisect_left(all_ends, max(overlap_start, start + 1))
+            if i < len(all_ends) and all_ends[i] < end:
+                start = all_ends[i]
+            elif not at_separator:
+                start = overlap_start
+            else:
+                start = end
+            prev_end = end
+
+        return spans
+
+    @staticmethod
+    def _last_cut(ends_by_priority: List[List[int]], low: int, high: int):
+        """在 (low, high] 內依優先順序找最後一個切點，沒有則返回 None"""
+        for ends in ends_by_priority:
+            i = bisect_right(ends, high) - 1
+            if i >= 0 and ends[i] > low:
+                return ends[i]
+        return None
+
+    def split_documents(self, documents: List["Document"]) -> List["Document"]:
+        """分割文件，每個片段各自複製原文件的 metadata"""
+        from langchain.schema import Document
+
+        return [
+            Document(page_content=chunk, metadata=copy.deepcopy(doc.metadata))
+            for doc in documents
+            for chunk in self.split_text(doc.page_content)
+        ]
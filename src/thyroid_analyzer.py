@@ -5,8 +5,23 @@
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
+import numpy as np
 import pandas as pd
 from config import Config
+from src.analysis_cache import AnalysisCache
+
+# 每個分析器保留的分析結果數量
+_ANALYSIS_CACHE_SIZE = 1024
+
+# 檢驗狀態字串（模組層級常數，比對時共用同一物件）
+_NORMAL = "正常"
+_LOW = "偏低"
+_HIGH = "偏高"
+_POSITIVE = "陽性"
+_NEGATIVE = "陰性"
+
+# 狀態位元遮罩對應的文字：bit 0 = 低於下限，bit 1 = 高於上限
+_RANGE_STATUS = (_NORMAL, _LOW, _HIGH)
 
 class ThyroidStatus(Enum):
     """甲狀腺功能狀態"""
@@ -17,7 +32,85 @@ class ThyroidStatus(Enum):
     SUBCLINICAL_HYPO = "亞臨床甲狀腺功能低下"
     CENTRAL_HYPOTHYROID = "中樞性甲狀腺功能低下"
 
-@dataclass
+def _status_for(tsh_s: str, ft4_s: Optional[str], ft3_s: Optional[str]) -> ThyroidStatus:
+    """依 TSH / FT4 / FT3 狀態判斷甲狀腺功能（僅用於建表）"""
+    if tsh_s == _LOW:
+        if _HIGH in (ft4_s, ft3_s):
+            return ThyroidStatus.HYPERTHYROID
+        return ThyroidStatus.SUBCLINICAL_HYPER
+    if tsh_s == _HIGH:
+        if ft4_s == _LOW:
+            return ThyroidStatus.HYPOTHYROID
+        return ThyroidStatus.SUBCLINICAL_HYPO
+    if ft4_s == _LOW:
+        return ThyroidStatus.CENTRAL_HYPOTHYROID
+    return ThyroidStatus.NORMAL
+
+# (TSH 狀態, FT4 狀態, FT3 狀態) -> 甲狀腺功能狀態，未檢驗的項目為 None
+_STATUS_TABLE = {
+    (tsh_s, ft4_s, ft3_s): _status_for(tsh_s, ft4_s, ft3_s)
+    for tsh_s in _RANGE_STATUS
+    for ft4_s in (None,) + _RANGE_STATUS
+    for ft3_s in (None,) + _RANGE_STATUS
+}
+
+# 批次分析用的狀態代碼：0 正常、1 偏低、2 偏高、3 未檢驗
+_MISSING_CODE = 3
+_CODE_STATUS = _RANGE_STATUS + (None,)
+_CODE_ANTIBODY_STATUS = (_NEGATIVE, _NEGATIVE, _POSITIVE, None)
+
+# _STATUS_TABLE 的陣列形式，以 (TSH, FT4, FT3) 狀態代碼索引
+_STATUS_ARRAY = np.array([
+    [
+        [_STATUS_TABLE.get((tsh_s, ft4_s, ft3_s), ThyroidStatus.NORMAL) for ft3_s in _CODE_STATUS]
+        for ft4_s in _CODE_STATUS
+    ]
+    for tsh_s in _CODE_STATUS
+], dtype=object)
+
+# 正常值範圍的結構陣列（SoA）形式，欄位順序同 Config.LAB_TESTS
+# 上下限轉為 Python float 列表，單筆判讀時直接做純量比較
+_TEST_NAMES = Config.LAB_TESTS
+_INDEX = {name: j for j, name in enumerate(_TEST_NAMES)}
+_MINS = Config.NORMAL_MINS.tolist()
+_MAXS = Config.NORMAL_MAXS.tolist()
+_UNITS = tuple(r.get("unit", "") for r in Config.NORMAL_RANGES.values())
+_HAS_RANGE = tuple("min" in r and "max" in r for r in Config.NORMAL_RANGES.values())
+_REF_RANGES = tuple(
+    f"{r['min']}-{r['max']} {unit}" if has_range else f"< {r['max']} {unit}"
+    for r, unit, has_range in zip(Config.NORMAL_RANGES.values(), _UNITS, _HAS_RANGE)
+)
+# 各項目狀態代碼（0 正常、1 偏低、2 偏高）對應的文字；抗體檢測僅有上限，超過為陽性
+_STATUS_LABELS = tuple(
+    _RANGE_STATUS if has_range else (_NEGATIVE, _NEGATIVE, _POSITIVE)
+    for has_range in _HAS_RANGE
+)
+
+# 各甲狀腺功能狀態固定的建議事項與額外檢查（依狀態而變的項目於分析時另行加入）
+_RECOMMENDATIONS = {
+    ThyroidStatus.HYPERTHYROID: (
+        "建議儘快就診內分泌科",
+        "可能需要抗甲狀腺藥物治療",
+        "避免含碘食物和藥物",
+        "監測心率和血壓",
+        "如有眼部症狀，需眼科評估"
+    ),
+    ThyroidStatus.HYPOTHYROID: (
+        "建議開始甲狀腺素補充治療",
+        "定期監測TSH水平（初期每6-8週）",
+        "注意藥物服用時間（空腹）",
+        "評估心血管風險",
+        "如懷孕需立即調整劑量"
+    )
+}
+_HYPO_TESTS = ("血脂肪檢查", "維生素 B12", "甲狀腺超音波")
+_ADDITIONAL_TESTS = {
+    ThyroidStatus.HYPERTHYROID: ("甲狀腺超音波", "甲狀腺掃描（如需要）", "肝功能檢查", "全血球計數"),
+    ThyroidStatus.HYPOTHYROID: _HYPO_TESTS,
+    ThyroidStatus.SUBCLINICAL_HYPO: _HYPO_TESTS
+}
+
+@dataclass(frozen=True, slots=True)
 class LabResult:
     """檢驗結果"""
     name: str
@@ -26,7 +119,7 @@ class LabResult:
     status: str  # 正常/偏高/偏低/陽性/陰性
     reference_range: str
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DiagnosisResult:
     """診斷結果"""
     thyroid_status: ThyroidStatus
@@ -39,6 +132,7 @@ class ThyroidAnalyzer:
     def __init__(self):
         """初始化甲狀腺分析器"""
         self.normal_ranges = Config.NORMAL_RANGES
+        self._analysis_cache = AnalysisCache(self._analyze, _ANALYSIS_CACHE_SIZE)
     
     def analyze(self, lab_data: Dict[str, float], 
                 symptoms: List[str] = [],
@@ -52,8 +146,21 @@ class ThyroidAnalyzer:
             medical_history: 病史資訊
             
         Returns:
-            DiagnosisResult: 診斷結果
+            DiagnosisResult: 診斷結果（相同輸入共用同一個快取結果，請勿修改）
         """
+        return self._analysis_cache(lab_data, symptoms, medical_history)
+    
+    def clear_cache(self):
+        """清除分析結果快取"""
+        self._analysis_cache.clear()
+    
+    def _analyze(
+        self,
+        lab_data: Dict[str, float],
+        symptoms: List[str],
+        medical_history: Dict[str, Any]
+    ) -> DiagnosisResult:
+        """執行分析流程"""
         # 解讀檢驗數值
         lab_results = self._parse_lab_results(lab_data)
         
@@ -86,39 +193,69 @@ class ThyroidAnalyzer:
             additional_tests=additional_tests
         )
     
+    def analyze_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        批次判讀多位病人的檢驗結果
+        
+        Args:
+            df: 每列一位病人、每欄一個檢驗項目（欄名同 LAB_TESTS），NaN 表示未檢驗
+            
+        Returns:
+            pd.DataFrame: 各項目狀態欄（{檢驗項目}_status，未檢驗為 NaN）與 thyroid_status 欄，索引同 df
+        """
+        test_names = [name for name in _TEST_NAMES if name in df.columns]
+        indices = [_INDEX[name] for name in test_names]
+        values = df[test_names].to_numpy(dtype=np.float64)
+        
+        # 一次比較整個 (病人數, 項目數) 矩陣，得到狀態代碼；Numba 核心於首次批次判讀時才載入
+        from src.lab_kernels import classify_lab_values
+        codes = classify_lab_values(values, Config.NORMAL_MINS[indices], Config.NORMAL_MAXS[indices])
+        
+        result = pd.DataFrame(index=df.index)
+        for j, test_name in enumerate(test_names):
+            labels = _CODE_STATUS if _HAS_RANGE[indices[j]] else _CODE_ANTIBODY_STATUS
+            result[f"{test_name}_status"] = np.array(labels, dtype=object)[codes[:, j]]
+        
+        def column_codes(test_name: str) -> np.ndarray:
+            if test_name in df.columns:
+                return codes[:, test_names.index(test_name)]
+            return np.full(len(df), _MISSING_CODE, dtype=np.int8)
+        
+        tsh_codes = column_codes("TSH")
+        ft4_codes = column_codes("Free_T4")
+        status = _STATUS_ARRAY[tsh_codes, ft4_codes, column_codes("Free_T3")]
+        
+        # TSH 升高且 FT4 正常時，TSH > 10 視為甲狀腺功能低下
+        if "TSH" in df.columns:
+            overt = (tsh_codes == 2) & (ft4_codes == 0) & (df["TSH"].to_numpy(dtype=np.float64) > 10)
+            status[overt] = ThyroidStatus.HYPOTHYROID
+        result["thyroid_status"] = status
+        
+        return result
+    
     def _parse_lab_results(self, lab_data: Dict[str, float]) -> Dict[str, LabResult]:
         """解析檢驗結果"""
         results = {}
         
         for test_name, value in lab_data.items():
-            if test_name in self.normal_ranges:
-                normal_range = self.normal_ranges[test_name]
-                unit = normal_range.get("unit", "")
-                
-                # 判斷狀態
-                if "min" in normal_range and "max" in normal_range:
-                    if value < normal_range["min"]:
-                        status = "偏低"
-                    elif value > normal_range["max"]:
-                        status = "偏高"
-                    else:
-                        status = "正常"
-                    ref_range = f"{normal_range['min']}-{normal_range['max']} {unit}"
-                else:
-                    # 抗體檢測
-                    if value > normal_range["max"]:
-                        status = "陽性"
-                    else:
-                        status = "陰性"
-                    ref_range = f"< {normal_range['max']} {unit}"
-                
-                results[test_name] = LabResult(
-                    name=test_name,
-                    value=value,
-                    unit=unit,
-                    status=status,
-                    reference_range=ref_range
-                )
+            j = _INDEX.get(test_name)
+            if j is None:
+                continue
+            
+            if value < _MINS[j]:
+                code = 1
+            elif value > _MAXS[j]:
+                code = 2
+            else:
+                code = 0
+            
+            results[test_name] = LabResult(
+                name=test_name,
+                value=value,
+                unit=_UNITS[j],
+                status=_STATUS_LABELS[j][code],
+                reference_range=_REF_RANGES[j]
+            )
         
         return results
     
@@ -131,34 +268,17 @@ class ThyroidAnalyzer:
         if not tsh:
             return ThyroidStatus.NORMAL
         
-        # 甲狀腺功能亢進
-        if tsh.status == "偏低":
-            if ft4 and ft4.status == "偏高":
-                return ThyroidStatus.HYPERTHYROID
-            elif ft3 and ft3.status == "偏高":
-                return ThyroidStatus.HYPERTHYROID
-            else:
-                return ThyroidStatus.SUBCLINICAL_HYPER
-        
-        # 甲狀腺功能低下
-        elif tsh.status == "偏高":
-            if ft4 and ft4.status == "偏低":
-                return ThyroidStatus.HYPOTHYROID
-            elif ft4 and ft4.status == "正常":
-                # TSH 輕度升高 (4-10)
-                if tsh.value <= 10:
-                    return ThyroidStatus.SUBCLINICAL_HYPO
-                else:
-                    return ThyroidStatus.HYPOTHYROID
-            else:
-                return ThyroidStatus.SUBCLINICAL_HYPO
+        ft4_s = ft4.status if ft4 else None
+        status = _STATUS_TABLE.get(
+            (tsh.status, ft4_s, ft3.status if ft3 else None),
+            ThyroidStatus.NORMAL
+        )
         
-        # 中樞性甲狀腺功能低下（罕見）
-        elif tsh.status == "正常" or tsh.status == "偏低":
-            if ft4 and ft4.status == "偏低":
-                return ThyroidStatus.CENTRAL_HYPOTHYROID
+        # TSH 升高且 FT4 正常時，TSH > 10 視為甲狀腺功能低下，輕度升高 (4-10) 為亞臨床
+        if tsh.status == _HIGH and ft4_s == _NORMAL and tsh.value > 10:
+            return ThyroidStatus.HYPOTHYROID
         
-        return ThyroidStatus.NORMAL
+        return status
     
     def _generate_differential_diagnosis(
         self, 
@@ -167,40 +287,31 @@ class ThyroidAnalyzer:
         symptoms: List[str] = [],
         medical_history: Dict[str, Any] = {}
     ) -> List[Tuple[str, float]]:
-        """生成鑑別診斷"""
-        differential = []
-        
+        """生成鑑別診斷（各分支已依可能性由高至低排列）"""
         if thyroid_status == ThyroidStatus.HYPERTHYROID:
             # 檢查抗體
             trab = lab_results.get("TSH_receptor_Ab")
-            if trab and trab.status == "陽性":
-                differential.append(("Graves' disease", 0.8))
-            else:
-                differential.append(("毒性多結節性甲狀腺腫", 0.4))
-                differential.append(("毒性腺瘤", 0.3))
-                differential.append(("亞急性甲狀腺炎", 0.2))
+            if trab and trab.status == _POSITIVE:
+                return [("Graves' disease", 0.8)]
+            return [("毒性多結節性甲狀腺腫", 0.4), ("毒性腺瘤", 0.3), ("亞急性甲狀腺炎", 0.2)]
         
-        elif thyroid_status == ThyroidStatus.HYPOTHYROID:
+        if thyroid_status == ThyroidStatus.HYPOTHYROID:
             # 檢查抗體
             anti_tpo = lab_results.get("Anti_TPO")
             anti_tg = lab_results.get("Anti_Tg")
             
-            if (anti_tpo and anti_tpo.status == "陽性") or \
-               (anti_tg and anti_tg.status == "陽性"):
-                differential.append(("橋本氏甲狀腺炎", 0.7))
-            else:
-                differential.append(("原發性甲狀腺功能低下", 0.5))
-                differential.append(("碘缺乏", 0.2))
-                differential.append(("藥物引起", 0.2))
+            if (anti_tpo and anti_tpo.status == _POSITIVE) or \
+               (anti_tg and anti_tg.status == _POSITIVE):
+                return [("橋本氏甲狀腺炎", 0.7)]
+            return [("原發性甲狀腺功能低下", 0.5), ("碘缺乏", 0.2), ("藥物引起", 0.2)]
         
-        elif thyroid_status == ThyroidStatus.SUBCLINICAL_HYPO:
+        if thyroid_status == ThyroidStatus.SUBCLINICAL_HYPO:
             anti_tpo = lab_results.get("Anti_TPO")
-            if anti_tpo and anti_tpo.status == "陽性":
-                differential.append(("早期橋本氏甲狀腺炎", 0.6))
-            else:
-                differential.append(("亞臨床甲狀腺功能低下", 0.7))
+            if anti_tpo and anti_tpo.status == _POSITIVE:
+                return [("早期橋本氏甲狀腺炎", 0.6)]
+            return [("亞臨床甲狀腺功能低下", 0.7)]
         
-        return sorted(differential, key=lambda x: x[1], reverse=True)
+        return []
     
     def _generate_recommendations(
         self,
@@ -209,27 +320,9 @@ class ThyroidAnalyzer:
         symptoms: List[str] = []
     ) -> List[str]:
         """生成建議事項"""
-        recommendations = []
+        recommendations = list(_RECOMMENDATIONS.get(thyroid_status, ()))
         
-        if thyroid_status == ThyroidStatus.HYPERTHYROID:
-            recommendations.extend([
-                "建議儘快就診內分泌科",
-                "可能需要抗甲狀腺藥物治療",
-                "避免含碘食物和藥物",
-                "監測心率和血壓",
-                "如有眼部症狀，需眼科評估"
-            ])
-        
-        elif thyroid_status == ThyroidStatus.HYPOTHYROID:
-            recommendations.extend([
-                "建議開始甲狀腺素補充治療",
-                "定期監測TSH水平（初期每6-8週）",
-                "注意藥物服用時間（空腹）",
-                "評估心血管風險",
-                "如懷孕需立即調整劑量"
-            ])
-        
-        elif thyroid_status == ThyroidStatus.SUBCLINICAL_HYPO:
+        if thyroid_status == ThyroidStatus.SUBCLINICAL_HYPO:
             tsh = lab_results.get("TSH")
             if tsh and tsh.value > 7:
                 recommendations.append("TSH > 7，建議考慮治療")
@@ -253,23 +346,10 @@ class ThyroidAnalyzer:
         if "Anti_TPO" not in lab_results:
             tests.append("Anti-TPO 抗體")
         
-        if thyroid_status == ThyroidStatus.HYPERTHYROID:
-            if "TSH_receptor_Ab" not in lab_results:
-                tests.append("TSH 受體抗體 (TRAb)")
-            tests.extend([
-                "甲狀腺超音波",
-                "甲狀腺掃描（如需要）",
-                "肝功能檢查",
-                "全血球計數"
-            ])
-        
-        elif thyroid_status in [ThyroidStatus.HYPOTHYROID, ThyroidStatus.SUBCLINICAL_HYPO]:
-            tests.extend([
-                "血脂肪檢查",
-                "維生素 B12",
-                "甲狀腺超音波"
-            ])
+        if thyroid_status == ThyroidStatus.HYPERTHYROID and "TSH_receptor_Ab" not in lab_results:
+            tests.append("TSH 受體抗體 (TRAb)")
         
+        tests.extend(_ADDITIONAL_TESTS.get(thyroid_status, ()))
         return tests
     
     def _calculate_confidence(
@@ -299,39 +379,30 @@ class ThyroidAnalyzer:
     def generate_report(self, diagnosis_result: DiagnosisResult, 
                        lab_data: Dict[str, float]) -> str:
         """生成診斷報告"""
-        report = f"""
-# 甲狀腺功能檢查報告
-
-## 檢驗結果
-"""
+        parts = ["\n# 甲狀腺功能檢查報告\n\n## 檢驗結果\n"]
+        
         # 檢驗數值表格
         for test_name, value in lab_data.items():
-            if test_name in self.normal_ranges:
-                normal_range = self.normal_ranges[test_name]
-                unit = normal_range.get("unit", "")
-                report += f"- **{test_name}**: {value} {unit}\n"
-        
-        report += f"""
-## 診斷
-**甲狀腺功能狀態**: {diagnosis_result.thyroid_status.value}
-**診斷信心度**: {diagnosis_result.confidence:.0%}
-
-## 鑑別診斷
-"""
+            j = _INDEX.get(test_name)
+            if j is not None:
+                parts.append(f"- **{test_name}**: {value} {_UNITS[j]}\n")
+        
+        parts.append(
+            f"\n## 診斷\n"
+            f"**甲狀腺功能狀態**: {diagnosis_result.thyroid_status.value}\n"
+            f"**診斷信心度**: {diagnosis_result.confidence:.0%}\n"
+            f"\n## 鑑別診斷\n"
+        )
         for diagnosis, probability in diagnosis_result.differential_diagnosis:
-            report += f"- {diagnosis} (可能性: {probability:.0%})\n"
+            parts.append(f"- {diagnosis} (可能性: {probability:.0%})\n")
         
-        report += """
-## 建議事項
-"""
+        parts.append("\n## 建議事項\n")
         for rec in diagnosis_result.recommendations:
-            report += f"- {rec}\n"
+            parts.append(f"- {rec}\n")
         
         if diagnosis_result.additional_tests:
-            report += """
-## 建議額外檢查
-"""
+            parts.append("\n## 建議額外檢查\n")
             for test in diagnosis_result.additional_tests:
-                report += f"- {test}\n"
+                parts.append(f"- {test}\n")
         
-        return report
+        return "".join(parts)
@@ -0,0 +1,73 @@
+"""
+檢驗結果視覺化工具
+Streamlit 介面與 API 共用的圖表與表格建構函式
+"""
+from typing import Dict
+import pandas as pd
+import plotly.graph_objects as go
+from config import Config
+from src.thyroid_analyzer import ThyroidAnalyzer
+
+# 圖表使用的正常範圍上下限（抗體檢測僅有上限，下限以 0 表示）
+CHART_BOUNDS = {
+    test_name: (normal_range.get("min", 0), normal_range["max"])
+    for test_name, normal_range in Config.NORMAL_RANGES.items()
+}
+
+def create_lab_chart(lab_data: Dict[str, float]) -> go.Figure:
+    """創建檢驗結果視覺化圖表"""
+    tests = tuple(test_name for test_name in lab_data if test_name in CHART_BOUNDS)
+    values = tuple(lab_data[test_name] for test_name in tests)
+    lower_bounds = tuple(CHART_BOUNDS[test_name][0] for test_name in tests)
+    upper_bounds = tuple(CHART_BOUNDS[test_name][1] for test_name in tests)
+    
+    # 一次建構所有圖層與版面
+    fig = go.Figure(
+        data=[
+            # 正常範圍
+            go.Scatter(
+                x=tests,
+                y=upper_bounds,
+                mode='lines',
+                name='正常上限',
+                line=dict(color='green', dash='dash')
+            ),
+            go.Scatter(
+                x=tests,
+                y=lower_bounds,
+                mode='lines',
+                name='正常下限',
+                line=dict(color='green', dash='dash'),
+                fill='tonexty',
+                fillcolor='rgba(0,255,0,0.1)'
+            ),
+            # 實際數值
+            go.Scatter(
+                x=tests,
+                y=values,
+                mode='markers+lines',
+                name='檢驗值',
+                marker=dict(size=10, color='blue'),
+                line=dict(color='blue', width=2)
+            )
+        ],
+        layout=go.Layout(
+            title="檢驗結果與正常範圍比較",
+            xaxis_title="檢驗項目",
+            yaxis_title="數值",
+            hovermode='x unified'
+        )
+    )
+    
+    return fig
+
+def create_lab_dataframe(lab_data: Dict[str, float], analyzer: ThyroidAnalyzer) -> pd.DataFrame:
+    """創建檢驗結果表格"""
+    lab_results = list(analyzer._parse_lab_results(lab_data).values())
+    
+    return pd.DataFrame({
+        "檢驗項目": [result.name for result in lab_results],
+        "數值": [f"{result.value} {result.unit}" for result in lab_results],
+        "參考範圍": [result.reference_range for result in lab_results],
+        "狀態": [result.status for result in lab_results]
+    })
@@ -0,0 +1,40 @@
+"""
+SeparatorTextSplitter 的回歸測試
+"""
+from pathlib import Path
+import pytest
+from src.text_splitter import SeparatorTextSplitter
+
+SEPARATORS = ["\n\n", "\n", "。", "，", " ", ""]
+DOCUMENT_PATH = Path(__file__).resolve().parent.parent / "Thyroid function.md"
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(1000, 200), (100, 20), (50, 0)])
+def test_spans_advance_without_nesting(chunk_size, chunk_overlap):
+    text = DOCUMENT_PATH.read_text(encoding="utf-8")
+    splitter = SeparatorTextSplitter(chunk_size, chunk_overlap, SEPARATORS)
+    spans = splitter._split_spans(text)
+
+    # 每個片段的起點與終點都超過前一片段，不會落在前一片段之內
+    for (prev_start, prev_end), (start, end) in zip(spans, spans[1:]):
+        assert start > prev_start
+        assert end > prev_end
+        assert start >= prev_end - chunk_overlap
+
+    assert all(end - start <= chunk_size for start, end in spans)
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+
+    # 重疊造成的總長度約為原文的 (1 + overlap / size) 倍
+    total = sum(end - start for start, end in spans)
+    assert total <= len(text) * (1 + chunk_overlap / chunk_size) * 1.1
+
+def test_short_opening_paragraph_fills_chunk():
+    text = "Intro.\n\n" + "word " * 60
+    chunks = SeparatorTextSplitter(100, 20, SEPARATORS).split_text(text)
+
+    assert chunks[0].startswith("Intro.\n\nword")
+    assert all(len(chunk) <= 100 for chunk in chunks)
+
+def test_offsets_point_at_chunks():
+    text = DOCUMENT_PATH.read_text(encoding="utf-8")
+    for offset, chunk in SeparatorTextSplitter(100, 20, SEPARATORS).split_text_with_offsets(text):
+        assert text[offset:offset + len(chunk)] == chunk